@@ -0,0 +1,970 @@
+#benchmarks / simulations for the pomodoro timer
+#run headless with:  QT_QPA_PLATFORM=offscreen python bench_pomodoro.py <benchmark>
+#regression run (JSON results, non-zero exit past a threshold):  python bench_pomodoro.py suite
+import argparse
+import contextlib
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import wave
+
+import gh_pomodoro
+from gh_pomodoro import (
+    CountdownEngine, CircularCountdown, DigitalClock, MainWindow, CustomMessage, CustomTimer, Playlist, LofiPlayer, AlarmPlayer, add_background, assets, asset_path, load_multimedia,
+    SessionLog, StateStore, decode_wav, trim_leading_silence, load_alarm_pcm, PomodoroCore, SessionTimeline, load_presets,
+    DEFAULT_PRESETS, perf
+)
+
+from PyQt5.QtCore import Qt, QTimer, QTime, QT_VERSION_STR
+from PyQt5.QtGui import QPainter, QPen, QFont, QColor, QFontDatabase, QPixmap, QPixmapCache
+from PyQt5.QtWidgets import QApplication, QLabel
+
+
+def get_app():
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return QApplication.instance() or QApplication(sys.argv)
+
+
+#a MainWindow on a throwaway data folder; closing it flushes and stops its writer threads before the folder goes
+@contextlib.contextmanager
+def bench_window():
+    with tempfile.TemporaryDirectory(prefix="pomodoro-bench-") as folder:
+        window = MainWindow(data_dir=folder)
+        try:
+            yield window
+        finally:
+            window.close()
+
+
+#a countdown shown offscreen with its timer stopped and its caches built, ready for frames driven by hand
+def offscreen_countdown(app, cls, frames, clock):
+    widget = cls(frames + 1, clock=clock)
+    widget.resize(380, 400)
+    widget.show()
+    app.processEvents()     #let the offscreen window get exposed before painting
+    widget.start()
+    widget.timer.stop()     #frames are driven by hand
+    widget.repaint()        #first frame builds caches, not timed
+    return widget
+
+
+#fake monotonic clock so hours of countdown can be simulated in milliseconds
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+#simulates a countdown where every timer tick is late by up to max_late_ms, with occasional long stalls
+#(e.g. a modal popup open), and compares the deadline engine against the old one-decrement-per-tick approach
+def bench_drift(args):
+    rng = random.Random(args.seed)
+    total = int(args.hours * 3600)
+
+    def lateness():
+        late = rng.uniform(0, args.max_late_ms) / 1000
+        if rng.random() < args.stall_chance:
+            late += rng.uniform(0, args.stall_ms) / 1000
+        return late
+
+    clock = FakeClock()
+    engine = CountdownEngine(total, clock)
+    engine.start()
+    ticks = 0
+    while engine.remaining() > 0:
+        clock.now += engine.ms_to_next_second() / 1000 + lateness()
+        ticks += 1
+    engine_drift = clock.now - total
+
+    legacy_end = sum(1 + lateness() for _ in range(total + 1))   #old update_timer needs total + 1 ticks to finish
+    legacy_drift = legacy_end - total
+
+    print(f"simulated {args.hours} h countdown, ticks up to {args.max_late_ms} ms late, "
+          f"{args.stall_chance:.1%} chance of a {args.stall_ms} ms stall")
+    print(f"  deadline engine: {ticks} ticks, finished {engine_drift * 1000:.1f} ms late")
+    print(f"  tick counting:   {total + 1} ticks, finished {legacy_drift:.1f} s late")
+
+    budget = (args.max_late_ms + args.stall_ms) / 1000 + 0.001     #engine may only be off by the final tick's lateness
+    return 0 if engine_drift <= budget else 1
+
+
+#the original paintEvent: full redraw, new pens/fonts and a font registration every frame
+class LegacyCountdown(CircularCountdown):
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        rect = self.rect().adjusted(10, 10, -10, -90)
+        painter.setPen(QPen(QColor(222, 165, 122, 110), 20))
+        painter.drawArc(rect, 0, 360 * 16)
+        angle_span = int(360 * (self.remaining_seconds / self.total_seconds)) if self.total_seconds > 0 else 0
+        painter.setPen(QPen(self.arc_color, 15))
+        painter.drawArc(rect, 90 * 16, -angle_span * 16)
+        painter.setPen(QColor(249, 186, 94))
+        font_id = QFontDatabase.addApplicationFont(asset_path("DS-DIGIT.TTF"))
+        painter.setFont(QFont(QFontDatabase.applicationFontFamilies(font_id)[0], 40))
+        painter.drawText(rect, Qt.AlignCenter, self.countdown_text())
+
+    def dirty_region(self):
+        return self.rect()
+
+
+#renders N one-second ticks offscreen and reports the cost per frame of the old and cached paint paths;
+#the cached path must not load anything from disk once its first frame is painted
+def bench_paint(args):
+    app = get_app()
+    results = {}
+    for name, cls in (("before (full redraw)", LegacyCountdown), ("after (cached, dirty region)", CircularCountdown)):
+        clock = FakeClock()
+        widget = offscreen_countdown(app, cls, args.frames, clock)
+        before = assets.stats()
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            clock.now += 1
+            widget.repaint(widget.dirty_region())
+        results[name] = (time.perf_counter() - start) / args.frames
+        widget.close()
+    after = assets.stats()
+    disk_loads = after["misses"] - before["misses"]
+
+    print(f"painted {args.frames} frames offscreen")
+    for name, per_frame in results.items():
+        print(f"  {name}: {per_frame * 1e6:.0f} us/frame")
+    print(f"  cached path: {disk_loads} asset loads from disk, {after['hits'] - before['hits']} cache hits "
+          f"during frames ({after['loaded']} assets loaded in total)")
+    return 1 if disk_loads else 0
+
+
+#the original clock: wakes every second and calls setText whether or not the minute changed
+class LegacyClock(DigitalClock):
+    def schedule_next_minute(self):
+        self.timer.start(1000)
+
+    def update_time(self):
+        self.wakeups += 1
+        self.time_label.setText(QTime.currentTime().toString("hh:mm AP"))
+        self.text_updates += 1
+        if self.isVisible():
+            self.schedule_next_minute()
+
+
+#runs the old and minute-aligned clocks side by side and reports wakeups, label updates and CPU time
+def bench_clock(args):
+    app = get_app()
+    clocks = {"before (1 s timer)": LegacyClock(), "after (minute aligned)": DigitalClock()}
+    for clock in clocks.values():
+        clock.show()
+    app.processEvents()
+    for clock in clocks.values():
+        clock.wakeups = clock.text_updates = 0
+    aligned = clocks["after (minute aligned)"]
+    aligned.last_wall_ms -= 3600 * 1000     #as if the wall clock moved an hour since the last wakeup
+
+    cpu_start = time.process_time()
+    QTimer.singleShot(int(args.seconds * 1000), app.quit)
+    app.exec_()
+    cpu = time.process_time() - cpu_start
+
+    print(f"ran both clocks for {args.seconds} s ({cpu * 1000:.1f} ms CPU total)")
+    for name, clock in clocks.items():
+        per_minute = clock.wakeups * 60 / args.seconds
+        print(f"  {name}: {clock.wakeups} wakeups ({per_minute:.1f}/min), {clock.text_updates} setText calls")
+    detected = aligned.clock_jumps == 1 or args.seconds * 1000 < gh_pomodoro.CLOCK_RECHECK_MS
+    print(f"  simulated 1 h wall-clock jump: {aligned.clock_jumps} detected "
+          f"(next wakeup within {gh_pomodoro.CLOCK_RECHECK_MS // 1000} s)")
+    return 0 if detected else 1
+
+
+#idle cost of a running session with the full window showing vs hidden in mini (tray) mode
+def bench_tray(args):
+    app = get_app()
+    with bench_window() as window:
+        window.show()
+        app.processEvents()
+        window.core.start()
+        ticks = []
+        window.core.countdown.ticked.connect(lambda: ticks.append(1))
+
+        def measure():
+            ticks.clear()
+            window.clock.wakeups = 0
+            app.processEvents()
+            cpu_start = time.process_time()
+            QTimer.singleShot(int(args.seconds * 1000), app.quit)
+            app.exec_()
+            cpu = time.process_time() - cpu_start
+            wakeups = len(ticks) + window.clock.wakeups
+            return cpu * 1000 / args.seconds, wakeups * 60 / args.seconds, rss_kib(os.getpid()), assets.background_bytes()
+
+        results = {"main window": measure()}
+        window.enter_tray_mode()
+        redraws_before = window.tray.redraws
+        results["tray mode"] = measure()
+        redraws = window.tray.redraws - redraws_before
+
+        start = time.perf_counter()
+        window.activate()
+        app.processEvents()     #shown, background decoded again and the ring repainted
+        restore_ms = (time.perf_counter() - start) * 1000
+
+    print(f"running session, {args.seconds} s idle in each mode")
+    for name, (cpu_ms, wakeups, rss, background) in results.items():
+        print(f"  {name}: {cpu_ms:.2f} ms CPU/s, {wakeups:.1f} timer wakeups/min, {rss / 1024:.1f} MiB RSS, "
+              f"{background // 1024} KiB decoded backgrounds")
+    print(f"  tray icon redraws: {redraws}")
+    print(f"  restore from tray to a painted window: {restore_ms:.1f} ms")
+    return 0
+
+
+#presets.json parse vs cached load, timeline build cost, and a simulated day of transitions (each an index + 1)
+def bench_presets(args):
+    app = get_app()
+    with tempfile.TemporaryDirectory(prefix="pomodoro-bench-") as folder:
+        path = os.path.join(folder, "presets.json")
+        with open(path, "w", encoding="utf-8") as config_file:
+            json.dump({"presets": {f"preset {i}": {"work_minutes": 20 + i % 40, "break_minutes": 5,
+                                                   "long_break_every": 3}
+                                   for i in range(args.presets)},
+                       "plans": {"default": "preset 0", "saturday": "preset 1"}}, config_file)
+        start = time.perf_counter()
+        config = load_presets(path)
+        parse_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for _ in range(1000):
+            load_presets(path)
+        cached_us = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for preset in DEFAULT_PRESETS.values():
+        SessionTimeline(preset)
+    build_us = (time.perf_counter() - start) * 1e6 / len(DEFAULT_PRESETS)
+
+    clock = FakeClock()
+    core = PomodoroCore(clock=clock, config=config)
+    core.set_preset(DEFAULT_PRESETS["Classic (25 : 5)"])
+    modes = []
+    elapsed = 0.0
+    for _ in range(args.days * len(core.timeline)):
+        core.start()
+        clock.now += core.countdown.engine.remaining()
+        start = time.perf_counter()
+        core.countdown.update_timer()       #finish + lookup of the next session
+        elapsed += time.perf_counter() - start
+        modes.append(core.mode)
+    expected = [mode for mode, _, _ in core.timeline.sessions[1:] + core.timeline.sessions[:1]] * args.days
+
+    print(f"presets.json with {args.presets} presets: parsed in {parse_ms:.2f} ms, cached load {cached_us:.2f} us")
+    print(f"  day timeline build: {build_us:.1f} us per preset")
+    print(f"  {len(modes)} transitions: {elapsed * 1e6 / len(modes):.1f} us each (finish + next-session lookup), "
+          f"{modes.count('long_break')} long breaks, sequence {'matches' if modes == expected else 'DIFFERS from'} "
+          f"the timeline")
+    return 0 if modes == expected else 1
+
+
+#fires work -> break -> work transitions with nobody clicking the popups; each must finish inside the latency
+#budget, the break must already be counting down, and transitions missed during a stall must share one popup
+def bench_transitions(args):
+    app = get_app()
+    with bench_window() as window:
+        window.show()
+        app.processEvents()
+        core = window.core
+        countdown = core.countdown
+        failures = []
+        latencies = []
+
+        for _ in range(args.cycles * 2):
+            finished_mode = core.mode
+            expected_mode, expected_seconds, _ = core.timeline[core.index + 1]    #long breaks come from the preset
+            core.start()
+            countdown.engine.deadline = countdown.engine.clock()    #session runs out now
+            start = time.perf_counter()
+            countdown.update_timer()
+            latencies.append((time.perf_counter() - start) * 1000)
+            app.processEvents()
+            if core.mode != expected_mode or countdown.total_seconds != expected_seconds:
+                failures.append(f"expected {expected_mode} ({expected_seconds} s), got {core.mode}")
+            if finished_mode == "work" and not countdown.engine.running:
+                failures.append(f"{core.mode} did not start immediately")
+
+        # work ends during a stall long enough that the break is also over -> both transitions coalesce
+        core.set_durations(core.work_minutes, core.break_minutes)
+        core.start()
+        countdown.engine.deadline = countdown.engine.clock() - core.break_minutes * 60 - 5
+        countdown.update_timer()
+        app.processEvents()
+        popups = [w for w in app.topLevelWidgets() if isinstance(w, CustomMessage) and w.isVisible()]
+        if core.mode != "work" or len(popups) != 1 or popups[0].label.text() != "~~back to work~~":
+            failures.append(f"missed transitions not coalesced: mode={core.mode}, {len(popups)} popups open")
+
+    worst = max(latencies)
+    print(f"{len(latencies)} unattended transitions: mean {sum(latencies) / len(latencies):.2f} ms, "
+          f"worst {worst:.2f} ms (budget {args.budget_ms} ms)")
+    if worst > args.budget_ms:
+        failures.append(f"worst transition {worst:.2f} ms over budget")
+    for failure in failures:
+        print(f"  FAIL: {failure}")
+    return 1 if failures else 0
+
+
+#the original popup background: full-size decode every time, rescaled on every paint
+def legacy_background(widget, filename):
+    label = QLabel(widget)
+    label.setPixmap(QPixmap(asset_path(filename)))
+    label.setScaledContents(True)
+    label.setGeometry(0, 0, widget.width(), widget.height())
+    label.lower()
+
+
+def time_popup_open(app, popup_cls):
+    start = time.perf_counter()
+    popup = popup_cls(*(("Session Over!", "~~take a break~~") if popup_cls is CustomMessage else ()))
+    popup.show()
+    app.processEvents()     #includes the first paint
+    elapsed = (time.perf_counter() - start) * 1000
+    popup.close()
+    return elapsed
+
+
+#resident decoded image bytes and popup open time: full-size decodes vs pre-scaled cache (cold and prewarmed)
+def bench_images(args):
+    app = get_app()
+    full_bytes = 0
+    for filename in ("trains.jpg", CustomMessage.BACKGROUND, CustomTimer.BACKGROUND):
+        full = QPixmap(asset_path(filename))
+        full_bytes += full.width() * full.height() * full.depth() // 8
+
+    print(f"resident background bytes, full-size decode: {full_bytes / 1024:.0f} KiB")
+    results = {}
+    for popup_cls in (CustomMessage, CustomTimer):
+        name = popup_cls.__name__
+        gh_pomodoro.add_background = legacy_background
+        try:
+            results[f"{name} before (full decode)"] = time_popup_open(app, popup_cls)
+        finally:
+            gh_pomodoro.add_background = add_background
+        QPixmapCache.clear()
+        results[f"{name} after, cold"] = time_popup_open(app, popup_cls)
+        results[f"{name} after, prewarmed"] = time_popup_open(app, popup_cls)
+
+    with bench_window() as window:
+        window.prewarm_popups()
+        print(f"resident background bytes, pre-scaled cache: {assets.background_bytes() / 1024:.0f} KiB "
+              f"(limit {QPixmapCache.cacheLimit()} KiB)")
+    for name, ms in results.items():
+        print(f"  {name}: {ms:.2f} ms to open")
+    return 0
+
+
+#writes a short silent 16-bit mono WAV (test track for the playlist benchmark)
+def write_silence(path, seconds, rate=44100):
+    with wave.open(path, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(rate)
+        out.writeframes(b"\0\0" * int(seconds * rate))
+
+
+#playlist memory over a simulated multi-hour mix, plus the real track-switch gap where audio output exists
+def bench_playlist(args):
+    tracks = [f"track{i:03}.wav" for i in range(args.tracks)]
+    playlist = Playlist(tracks, shuffle=True, repeat=True, rng=random.Random(0))
+    switches = int(args.hours * 3600 / args.track_seconds)
+    tracemalloc.start()
+    for _ in range(1000):
+        playlist.peek_next()
+        playlist.advance()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for _ in range(switches):
+        playlist.peek_next()
+        playlist.advance()
+    growth = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    print(f"{switches} track switches ({args.hours} h of {args.track_seconds} s tracks, shuffle + repeat): "
+          f"playlist memory grew {growth} bytes")
+
+    app = get_app()
+    multimedia = load_multimedia()
+    if multimedia is None:
+        print("  track-switch gap: skipped, QtMultimedia is not available here")
+        return 0
+    gaps = []
+    with tempfile.TemporaryDirectory() as folder:
+        paths = []
+        for i in range(3):
+            paths.append(os.path.join(folder, f"{i}.wav"))
+            write_silence(paths[-1], 1)
+        lofi = LofiPlayer(multimedia, Playlist(paths, repeat=True))
+        lofi.play()
+        deadline = time.monotonic() + args.switches * 1.5 + 5
+        while len(gaps) < args.switches and time.monotonic() < deadline:
+            app.processEvents()
+            if lofi.last_gap_ms is not None:
+                gaps.append(lofi.last_gap_ms)
+                lofi.last_gap_ms = None
+            time.sleep(0.001)
+        lofi.pause()
+    if gaps:
+        print(f"  track-switch gap over {len(gaps)} switches: mean {sum(gaps) / len(gaps):.1f} ms, "
+              f"worst {max(gaps):.1f} ms")
+    else:
+        print("  track-switch gap: no track switches observed (no audio output device?)")
+    return 0
+
+
+#one-off cost of preparing the resident alarm PCM, and (where audio output exists) play -> first audio latency
+def bench_alarm(args):
+    path = asset_path("alarm_sound.wav")
+    samples, channels, rate = decode_wav(path)
+    trimmed = trim_leading_silence(samples, channels)
+    with tempfile.TemporaryDirectory(prefix="pomodoro-bench-") as folder:
+        cache_path = os.path.join(folder, gh_pomodoro.ALARM_CACHE_FILE)
+        start = time.perf_counter()
+        pcm = load_alarm_pcm(path, args.channels, args.rate, cache_path)    #first launch: decode + resample
+        prepare_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        cached = load_alarm_pcm(path, args.channels, args.rate, cache_path)
+        cached_ms = (time.perf_counter() - start) * 1000
+    print(f"alarm PCM prepared in {prepare_ms:.0f} ms on the first launch, {cached_ms:.1f} ms from the cache "
+          f"({'identical' if cached == pcm else 'DIFFERENT'}): {os.path.getsize(path) / 1024:.0f} KiB file -> "
+          f"{len(pcm) / 1024:.0f} KiB resident at {args.channels} ch / {args.rate} Hz, "
+          f"{(len(samples) - len(trimmed)) / channels / rate * 1000:.1f} ms leading silence trimmed")
+
+    app = get_app()
+    multimedia = load_multimedia()
+    if multimedia is None:
+        print("  play latency: skipped, QtMultimedia is not available here")
+        return 0
+    alarm = AlarmPlayer(multimedia, path)
+    deadline = time.monotonic() + 10
+    while not alarm.ready and time.monotonic() < deadline:     #decoded off-thread, output opened on this one
+        app.processEvents()
+    latencies = []
+    for _ in range(args.plays):
+        alarm.play()
+        deadline = time.monotonic() + 2
+        while alarm.last_latency_ms is None and time.monotonic() < deadline:
+            app.processEvents()
+        if alarm.last_latency_ms is not None:
+            latencies.append(alarm.last_latency_ms)
+            alarm.last_latency_ms = None
+        alarm.stop()
+    if latencies:
+        print(f"  play -> audio active over {len(latencies)} plays: mean {sum(latencies) / len(latencies):.1f} ms, "
+              f"worst {max(latencies):.1f} ms")
+    else:
+        print("  play latency: output never became active (no audio output device?)")
+    return 0
+
+
+#GUI-thread cost of recording events, and time to open stats with years of history already on disk
+def bench_history(args):
+    with tempfile.TemporaryDirectory() as folder:
+        log = SessionLog(folder)
+        start = time.perf_counter()
+        for i in range(args.events):
+            log.record("session_finished", "work" if i % 2 else "break", 1500)
+        record_us = (time.perf_counter() - start) / args.events * 1e6
+        start = time.perf_counter()
+        log.close()
+        drain_ms = (time.perf_counter() - start) * 1000
+        with open(log.history_path) as history:
+            written = sum(1 for _ in history)
+
+        # fake years of rollups, then time a fresh start + stats lookup
+        for day in range(args.years * 365):
+            log.rollups["daily"][f"{2000 + day // 365}-{day % 365:03}"] = {"work_sessions": 8, "work_seconds": 12000}
+        log.flush([])
+        start = time.perf_counter()
+        reopened = SessionLog(folder)
+        reopened.stats()
+        open_ms = (time.perf_counter() - start) * 1000
+        reopened.close()
+
+    print(f"{args.events} events: {record_us:.1f} us each on the caller thread, writer drained in {drain_ms:.0f} ms, "
+          f"{written} lines on disk")
+    print(f"  stats with {args.years} years of daily rollups: {open_ms:.1f} ms to load and look up")
+    return 0 if written == args.events else 1
+
+
+#state snapshot cost: per tick on the GUI thread, the atomic write itself, and restore at start-up
+def bench_snapshot(args):
+    app = get_app()
+    with tempfile.TemporaryDirectory() as folder:
+        window = MainWindow(data_dir=folder)
+        window.core.start()
+        start = time.perf_counter()
+        for _ in range(args.ticks):
+            window.save_state()     #what the throttled snapshot timer does while running
+        tick_us = (time.perf_counter() - start) / args.ticks * 1e6
+
+        store = window.state_store
+        start = time.perf_counter()
+        for i in range(args.writes):
+            gh_pomodoro.write_atomic(store.path, json.dumps(dict(window.core.snapshot(), remaining=i)))
+        write_ms = (time.perf_counter() - start) / args.writes * 1000
+        window.close()
+
+        restores = []
+        for _ in range(args.restores):
+            start = time.perf_counter()
+            restored = StateStore(folder)
+            state = restored.load()
+            countdown = CircularCountdown()
+            countdown.restore(state["total_seconds"], state["remaining"], state["deadline"])
+            restores.append((time.perf_counter() - start) * 1000)
+            restored.close()
+    print(f"snapshot per tick (unchanged state skipped): {tick_us:.1f} us on the GUI thread")
+    print(f"  atomic write (temp + fsync + rename, writer thread): {write_ms:.2f} ms")
+    print(f"  restore (read state + rebuild countdown): mean {sum(restores) / len(restores):.2f} ms, "
+          f"worst {max(restores):.2f} ms")
+    return 0
+
+
+#blocking JSON-lines client for the control API (plain AF_UNIX socket on the server's full path)
+class ControlClient:
+    def __init__(self, path, timeout=5.0):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.settimeout(timeout)
+        self.socket.connect(path)
+        self.reader = self.socket.makefile("rb")
+
+    def send(self, **request):
+        self.socket.sendall(json.dumps(request).encode() + b"\n")
+
+    #next line with the given key ("ok" for replies, "event" for pushed events)
+    def receive(self, key="ok"):
+        while True:
+            line = self.reader.readline()
+            if not line:
+                raise ConnectionError("control API closed the connection")
+            message = json.loads(line)
+            if key in message:
+                return message
+
+    def request(self, **request):
+        self.send(**request)
+        return self.receive()
+
+
+def rss_kib(pid):
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+#starts N headless instances, then measures request throughput across them and event fan-out to S subscribers
+def bench_api(args):
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gh_pomodoro.py")
+    names = [f"pomodoro-bench-{os.getpid()}-{i}" for i in range(args.instances)]
+    start = time.perf_counter()
+    processes = [subprocess.Popen([sys.executable, script, "--headless", "--socket", name], stdout=subprocess.PIPE)
+                 for name in names]
+    try:
+        paths = [process.stdout.readline().decode().split(" listening on ")[1].strip()     #printed once ready
+                 for process in processes]
+        spawn_ms = (time.perf_counter() - start) * 1000 / args.instances
+        clients = [ControlClient(path) for path in paths]
+
+        start = time.perf_counter()
+        for client in clients:      #pipelined: every instance gets its requests before any reply is read
+            for _ in range(args.requests):
+                client.send(cmd="status")
+        for client in clients:
+            for _ in range(args.requests):
+                client.receive()
+        total = args.instances * args.requests
+        rate = total / (time.perf_counter() - start)
+
+        subscribers = []
+        for _ in range(args.subscribers):   #one at a time, the server's accept backlog is small
+            subscribers.append(ControlClient(paths[0]))
+            subscribers[-1].request(cmd="subscribe")
+        start = time.perf_counter()
+        clients[0].request(cmd="start")
+        fan_out = []
+        for subscriber in subscribers:
+            subscriber.receive("event")
+            fan_out.append((time.perf_counter() - start) * 1000)
+
+        rss = [rss_kib(process.pid) for process in processes]
+
+        #the same load on one process hosting every timer
+        name = f"pomodoro-bench-{os.getpid()}-hosted"
+        processes.append(subprocess.Popen([sys.executable, script, "--headless", "--socket", name,
+                                           "--timers", str(args.timers)], stdout=subprocess.PIPE))
+        client = ControlClient(processes[-1].stdout.readline().decode().split(" listening on ")[1].strip())
+        start = time.perf_counter()
+        for timer_id in range(args.timers):
+            client.send(cmd="start", id=str(timer_id))
+        for _ in range(args.timers):
+            client.receive()
+        hosted_rate = args.timers / (time.perf_counter() - start)
+        hosted_rss = rss_kib(processes[-1].pid)
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+        for name in names + [f"pomodoro-bench-{os.getpid()}-hosted"]:
+            path = os.path.join(tempfile.gettempdir(), name)    #SIGTERM skips the servers' own clean-up
+            if os.path.exists(path):
+                os.unlink(path)
+
+    print(f"{args.instances} headless instances, {spawn_ms:.0f} ms to start each, "
+          f"{sum(rss) / len(rss) / 1024:.1f} MiB RSS each")
+    print(f"  {total} status requests: {rate:.0f} requests/s")
+    print(f"  start -> event at all {args.subscribers} subscribers: {max(fan_out):.2f} ms "
+          f"(first {min(fan_out):.2f} ms)")
+    print(f"{args.timers} timers in one headless instance: {hosted_rss / 1024:.1f} MiB RSS "
+          f"({(hosted_rss - sum(rss) / len(rss)) / (args.timers - 1):.0f} KiB per extra timer), "
+          f"{hosted_rate:.0f} start requests/s")
+    return 0
+
+
+#polls until a control socket answers, returns the client
+def wait_for_server(path, timeout=30.0):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            client = ControlClient(path)
+            client.request(cmd="status")
+            return client
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            time.sleep(0.002)
+
+
+#cold start of a full window vs a second launch that hands its arguments to the running window and exits
+def bench_handoff(args):
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gh_pomodoro.py")
+    name = f"pomodoro-bench-{os.getpid()}"
+    path = os.path.join(tempfile.gettempdir(), name)      #QLocalServer's socket file on Linux
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    data_dir = tempfile.TemporaryDirectory(prefix="pomodoro-bench-")
+    base = [sys.executable, script, "--socket", name, "--data-dir", data_dir.name]
+
+    start = time.perf_counter()
+    window = subprocess.Popen(base, env=env)
+    try:
+        client = wait_for_server(path)
+        cold_ms = (time.perf_counter() - start) * 1000
+
+        launches = []
+        for i in range(args.launches):
+            start = time.perf_counter()
+            subprocess.run(base + ["--work", str(30 + i), "--break", "5", "--start"], env=env, check=True)
+            launches.append((time.perf_counter() - start) * 1000)
+        status = client.request(cmd="status")["status"]
+        applied = status["work_minutes"] == 30 + args.launches - 1 and status["running"]
+
+        calls = []
+        launch = gh_pomodoro.parse_args(["gh_pomodoro.py"])     #a plain launch: no flags, nothing to forward
+        for _ in range(args.launches):
+            start = time.perf_counter()
+            gh_pomodoro.quick_hand_off(name, launch)
+            calls.append((time.perf_counter() - start) * 1000)
+        still_single = window.poll() is None
+
+        floor = []      #bare interpreter start-up, the least any second launch can cost
+        for _ in range(args.launches):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", "pass"], check=True)
+            floor.append((time.perf_counter() - start) * 1000)
+    finally:
+        window.terminate()
+        window.wait()
+        data_dir.cleanup()
+        if os.path.exists(path):
+            os.unlink(path)     #SIGTERM skips the server's own clean-up
+
+    launches.sort()
+    floor.sort()
+    print(f"cold start (process spawn -> window built and control socket up): {cold_ms:.0f} ms")
+    print(f"second launch (process spawn -> args handed off -> exit): median {launches[len(launches) // 2]:.0f} ms, "
+          f"worst {launches[-1]:.0f} ms over {args.launches} launches")
+    print(f"  socket hand-off itself: mean {sum(calls) / len(calls):.2f} ms, "
+          f"bare interpreter start-up: median {floor[len(floor) // 2]:.0f} ms")
+    print(f"  durations/start applied by the running window: {'yes' if applied else 'NO'}, "
+          f"still one window: {'yes' if still_single else 'NO'}")
+    return 0 if applied and still_single else 1
+
+
+def median(values):
+    return sorted(values)[len(values) // 2]
+
+
+#cost of the instrumentation when off vs on, ring buffer append cost, stall detection and trace export
+def bench_perf(args):
+    app = get_app()
+    clock = FakeClock()
+    widget = offscreen_countdown(app, CircularCountdown, 2 * args.rounds * args.frames, clock)
+    results = {"off": [], "on": []}
+    for _ in range(args.rounds):       #interleaved, so warm-up and machine noise hit both modes alike
+        for name, enabled in (("off", False), ("on", True)):
+            perf.set_enabled(enabled)
+            start = time.perf_counter()
+            for _ in range(args.frames):
+                clock.now += 1
+                widget.repaint(widget.dirty_region())
+            results[name].append((time.perf_counter() - start) * 1e6 / args.frames)
+    widget.close()
+
+    start = time.perf_counter()
+    for i in range(100000):
+        perf.record("tick_jitter_ms", 0.1)
+    append_ns = (time.perf_counter() - start) * 1e9 / 100000
+
+    perf.set_enabled(True)
+    QTimer.singleShot(50, lambda: time.sleep(args.stall_ms / 1000))     #blocks the event loop
+    QTimer.singleShot(50 + args.stall_ms + 300, app.quit)
+    app.exec_()
+    stall = perf.channels["stall_ms"].summary()
+    with tempfile.TemporaryDirectory(prefix="pomodoro-bench-") as folder:
+        path = os.path.join(folder, "trace.json")
+        start = time.perf_counter()
+        events = perf.export_trace(path)
+        export_ms = (time.perf_counter() - start) * 1000
+        trace_kib = os.path.getsize(path) / 1024
+    perf.set_enabled(False)
+
+    print(f"countdown paint, {args.rounds} x {args.frames} frames per mode:")
+    for name, passes in results.items():
+        print(f"  instrumentation {name}: median {median(passes):.0f} us/frame (best {min(passes):.0f})")
+    print(f"  ring buffer append: {append_ns:.0f} ns (buffers hold {perf.channels['paint_ms'].size} samples each)")
+    print(f"  injected {args.stall_ms} ms stall, recorded: {stall['max']:.0f} ms (heartbeat every "
+          f"{gh_pomodoro.PERF_HEARTBEAT_MS} ms)" if stall else
+          "  injected stall NOT recorded")
+    print(f"  trace export: {events} events, {trace_kib:.0f} KiB in {export_ms:.1f} ms")
+    return 0 if stall else 1
+
+
+#upper limits for the regression suite, loose enough for a slow headless CI box (override with --thresholds)
+SUITE_THRESHOLDS = {
+    "startup_first_paint_ms": 1500,     #process start to first paint (the app's own --profile-startup)
+    "startup_peak_rss_mib": 200,        #VmHWM of that process after its first paint
+    "window_first_paint_ms": 400,       #MainWindow() + show + first paint, modules already imported
+    "paint_frame_us": 1500,             #CircularCountdown one-second tick, mean
+    "paint_frame_p95_us": 4000,
+    "clock_update_us": 300,             #DigitalClock.update_time, minute unchanged
+    "wakeups_per_minute": 75,           #countdown ticks + clock wakeups with a session running (60 + 7 expected)
+    "popup_custom_message_ms": 40,      #open + first paint, backgrounds prewarmed
+    "popup_custom_timer_ms": 40,
+}
+
+
+#runs the app as a user would and reads its start-up profile and peak RSS
+def measure_startup(script, runs):
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    first_paint, peak_rss = [], []
+    for run in range(runs):
+        name = f"pomodoro-suite-{os.getpid()}-{run}"
+        data_dir = tempfile.TemporaryDirectory(prefix="pomodoro-bench-")
+        process = subprocess.Popen(
+            [sys.executable, script, "--profile-startup", "--new-instance", "--socket", name,
+             "--data-dir", data_dir.name],
+            env=env, stderr=subprocess.PIPE)
+        try:
+            for line in process.stderr:     #the report is printed once, a second after the first paint
+                if b"time to first paint" in line:
+                    first_paint.append(float(line.split()[-2]))
+                    break
+            with open(f"/proc/{process.pid}/status") as status:
+                peak_rss.extend(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+        finally:
+            process.terminate()
+            process.wait()
+            data_dir.cleanup()
+            path = os.path.join(tempfile.gettempdir(), name)
+            if os.path.exists(path):
+                os.unlink(path)     #SIGTERM skips the server's own clean-up
+    if not first_paint:
+        raise RuntimeError("the app never reported its first paint")
+    return median(first_paint), median(peak_rss) / 1024
+
+
+#one run over the GUI hot paths: start-up, paint, clock, wakeups and popups, checked against SUITE_THRESHOLDS
+#and optionally against a previous results file (--baseline); any regression makes the exit status 1
+def bench_suite(args):
+    app = get_app()
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gh_pomodoro.py")
+    metrics = {}
+    metrics["startup_first_paint_ms"], metrics["startup_peak_rss_mib"] = measure_startup(script, args.runs)
+
+    start = time.perf_counter()
+    with bench_window() as window:
+        window.show()
+        app.processEvents()
+        metrics["window_first_paint_ms"] = (time.perf_counter() - start) * 1000
+
+        ticks = []
+        window.core.countdown.ticked.connect(lambda: ticks.append(1))
+        window.core.start()
+        window.clock.wakeups = 0
+        QTimer.singleShot(int(args.seconds * 1000), app.quit)
+        app.exec_()
+        metrics["wakeups_per_minute"] = (len(ticks) + window.clock.wakeups) * 60 / args.seconds
+        window.core.pause()
+
+        window.prewarm_popups()
+        metrics["popup_custom_message_ms"] = median([time_popup_open(app, CustomMessage) for _ in range(args.runs)])
+        metrics["popup_custom_timer_ms"] = median([time_popup_open(app, CustomTimer) for _ in range(args.runs)])
+
+    clock = FakeClock()
+    widget = offscreen_countdown(app, CircularCountdown, args.frames, clock)
+    frames = []
+    for _ in range(args.frames):
+        clock.now += 1
+        start = time.perf_counter()
+        widget.repaint(widget.dirty_region())
+        frames.append((time.perf_counter() - start) * 1e6)
+    widget.close()
+    metrics["paint_frame_us"] = sum(frames) / len(frames)
+    metrics["paint_frame_p95_us"] = sorted(frames)[int(len(frames) * 0.95)]
+
+    digital_clock = DigitalClock()
+    digital_clock.show()
+    app.processEvents()
+    start = time.perf_counter()
+    for _ in range(1000):
+        digital_clock.update_time()
+    metrics["clock_update_us"] = (time.perf_counter() - start) * 1000
+    digital_clock.close()
+
+    thresholds = dict(SUITE_THRESHOLDS)
+    if args.thresholds:
+        with open(args.thresholds, encoding="utf-8") as thresholds_file:
+            thresholds.update(json.load(thresholds_file))
+    failures = [f"{name} = {metrics[name]:.2f}, limit {limit}" for name, limit in thresholds.items()
+                if name in metrics and metrics[name] > limit]
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)["metrics"]
+        failures += [f"{name} = {value:.2f}, {(value / baseline[name] - 1) * 100:.0f}% over the baseline"
+                     for name, value in metrics.items()
+                     if baseline.get(name) and value > baseline[name] * (1 + args.tolerance)]
+
+    results = {
+        "timestamp": round(time.time()),
+        "platform": f"{sys.platform} ({os.environ.get('QT_QPA_PLATFORM', 'default')} qpa)",
+        "python": sys.version.split()[0],
+        "qt": QT_VERSION_STR,
+        "metrics": {name: round(value, 3) for name, value in metrics.items()},
+        "thresholds": thresholds,
+        "failures": failures,
+        "passed": not failures,
+    }
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(results, output, indent=2)
+
+    for name, value in metrics.items():
+        print(f"  {name:<26} {value:10.2f}   (limit {thresholds.get(name, '-')})")
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    print(f"results written to {args.output}")
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pomodoro timer benchmarks")
+    sub = parser.add_subparsers(dest="benchmark", required=True)
+
+    drift = sub.add_parser("drift", help="simulated multi-hour countdown drift")
+    drift.add_argument("--hours", type=float, default=8)
+    drift.add_argument("--max-late-ms", type=float, default=20)
+    drift.add_argument("--stall-chance", type=float, default=0.01)
+    drift.add_argument("--stall-ms", type=float, default=3000)
+    drift.add_argument("--seed", type=int, default=0)
+    drift.set_defaults(func=bench_drift)
+
+    paint = sub.add_parser("paint", help="countdown ring paint cost per frame")
+    paint.add_argument("--frames", type=int, default=1500)
+    paint.set_defaults(func=bench_paint)
+
+    clock = sub.add_parser("clock", help="DigitalClock wakeups and idle CPU")
+    clock.add_argument("--seconds", type=float, default=120)
+    clock.set_defaults(func=bench_clock)
+
+    tray = sub.add_parser("tray", help="idle CPU, wakeups and RSS of the main window vs mini (tray) mode")
+    tray.add_argument("--seconds", type=float, default=60)
+    tray.set_defaults(func=bench_tray)
+
+    presets = sub.add_parser("presets", help="preset config load and precomputed session timeline cost")
+    presets.add_argument("--presets", type=int, default=200)
+    presets.add_argument("--days", type=int, default=30)
+    presets.set_defaults(func=bench_presets)
+
+    transitions = sub.add_parser("transitions", help="session transition latency without dialog interaction")
+    transitions.add_argument("--cycles", type=int, default=20)
+    transitions.add_argument("--budget-ms", type=float, default=50)
+    transitions.set_defaults(func=bench_transitions)
+
+    images = sub.add_parser("images", help="background image memory and popup open latency")
+    images.set_defaults(func=bench_images)
+
+    playlist = sub.add_parser("playlist", help="lofi playlist memory and track-switch gap")
+    playlist.add_argument("--tracks", type=int, default=200)
+    playlist.add_argument("--track-seconds", type=float, default=180)
+    playlist.add_argument("--hours", type=float, default=1000)
+    playlist.add_argument("--switches", type=int, default=5)
+    playlist.set_defaults(func=bench_playlist)
+
+    alarm = sub.add_parser("alarm", help="alarm PCM preparation cost and play latency")
+    alarm.add_argument("--channels", type=int, default=2)
+    alarm.add_argument("--rate", type=int, default=48000)
+    alarm.add_argument("--plays", type=int, default=5)
+    alarm.set_defaults(func=bench_alarm)
+
+    history = sub.add_parser("history", help="session log record cost and stats open time")
+    history.add_argument("--events", type=int, default=100000)
+    history.add_argument("--years", type=int, default=10)
+    history.set_defaults(func=bench_history)
+
+    snapshot = sub.add_parser("snapshot", help="crash-safe state snapshot write and restore cost")
+    snapshot.add_argument("--ticks", type=int, default=10000)
+    snapshot.add_argument("--writes", type=int, default=200)
+    snapshot.add_argument("--restores", type=int, default=50)
+    snapshot.set_defaults(func=bench_snapshot)
+
+    api = sub.add_parser("api", help="headless control API throughput and event fan-out")
+    api.add_argument("--instances", type=int, default=20)
+    api.add_argument("--requests", type=int, default=200)
+    api.add_argument("--subscribers", type=int, default=100)
+    api.add_argument("--timers", type=int, default=500, help="timers hosted by the single-process run")
+    api.set_defaults(func=bench_api)
+
+    handoff = sub.add_parser("handoff", help="single-instance hand-off latency vs a cold start")
+    handoff.add_argument("--launches", type=int, default=10)
+    handoff.set_defaults(func=bench_handoff)
+
+    perf_parser = sub.add_parser("perf", help="instrumentation overhead, stall detection and trace export")
+    perf_parser.add_argument("--frames", type=int, default=100)
+    perf_parser.add_argument("--rounds", type=int, default=10)
+    perf_parser.add_argument("--stall-ms", type=int, default=300)
+    perf_parser.set_defaults(func=bench_perf)
+
+    suite = sub.add_parser("suite", help="regression suite over the GUI hot paths, JSON results + thresholds")
+    suite.add_argument("--output", default="bench_results.json", help="where the JSON results are written")
+    suite.add_argument("--thresholds", metavar="FILE", help="JSON {metric: limit} overriding SUITE_THRESHOLDS")
+    suite.add_argument("--baseline", metavar="FILE", help="earlier results to compare against")
+    suite.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs --baseline (0.25 = 25%%)")
+    suite.add_argument("--runs", type=int, default=3, help="start-ups and popup opens (median is kept)")
+    suite.add_argument("--frames", type=int, default=300)
+    suite.add_argument("--seconds", type=float, default=10, help="idle time with a running session")
+    suite.set_defaults(func=bench_suite)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,89 +1,1074 @@
+import time
+IMPORT_START = time.perf_counter()  #startup profiler: import phase begins
+
+import argparse
+import array
+import datetime
+import json
+import math
+import os
+import queue
+import random
+import socket
 import sys
+import threading
+import wave
+
+
+#session lengths are whole minutes above zero; raises ValueError otherwise (also argparse's type for --work/--break)
+def minutes(value):
+    value = int(value)
+    if value <= 0:
+        raise ValueError(f"{value} is not a positive number of minutes")
+    return value
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Lofi Pomodoro timer")
+    parser.add_argument("--headless", action="store_true", help="run only the timer core and its control socket")
+    parser.add_argument("--socket", metavar="NAME", help="serve the local control API on this socket name")
+    parser.add_argument("--timers", type=int, default=1, metavar="N",
+                        help="with --headless, host N timers (ids 0..N-1) in this process")
+    parser.add_argument("--work", type=minutes, metavar="MIN", help="work session length in minutes")
+    parser.add_argument("--break", type=minutes, metavar="MIN", dest="break_minutes", help="break length in minutes")
+    parser.add_argument("--preset", metavar="NAME", help="switch to a named preset (see presets.json)")
+    parser.add_argument("--start", action="store_true", help="start the timer right away")
+    parser.add_argument("--new-instance", action="store_true",
+                        help="open another window instead of handing off to the running one")
+    parser.add_argument("--lofi", metavar="PATH", help="lofi folder, .m3u playlist or audio file")
+    parser.add_argument("--data-dir", metavar="PATH", help="where history is kept (default ~/.lofi_pomodoro)")
+    parser.add_argument("--perf", action="store_true",
+                        help="record paint times, tick jitter, stalls and audio latency (View > Performance Overlay)")
+    parser.add_argument("--perf-trace", metavar="PATH", help="record as with --perf and write a trace file on exit")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print time to first paint split into phases, then keep running")
+    return parser.parse_known_args(argv[1:])[0]      #unknown args are left for Qt (e.g. -platform)
+
+
+#a second GUI launch by the same user hands off to whichever window listens here (headless cores use their own name)
+INSTANCE_SOCKET = "lofi-pomodoro-" + (os.environ.get("USER") or os.environ.get("USERNAME") or "user")
+
+
+#requests that carry a launch's command line over to the instance that is already running
+def launch_requests(args):
+    requests = []
+    if args.preset:
+        requests.append({"cmd": "preset", "name": args.preset})
+    if args.work or args.break_minutes:
+        requests.append({"cmd": "set", "work_minutes": args.work or 25, "break_minutes": args.break_minutes or 5})
+    if args.start:
+        requests.append({"cmd": "start"})
+    return requests
+
+
+#POSIX fast path of hand_off (below) that runs before the Qt imports, so a second launch exits in a few ms.
+#QLocalServer listens on $TMPDIR/<name> there; if nothing answers, the normal start-up takes over
+def quick_hand_off(name, args, timeout=0.2):
+    path = name if os.path.isabs(name) else os.path.join(os.environ.get("TMPDIR") or "/tmp", name)
+    requests = launch_requests(args) + [{"cmd": "activate"}]
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(timeout)
+            client.connect(path)
+            client.sendall(b"".join(json.dumps(request).encode() + b"\n" for request in requests))
+            client.settimeout(1.0)
+            replies = client.makefile("rb")
+            for _ in requests:
+                reply = json.loads(replies.readline())
+                if not reply["ok"]:
+                    print(f"running instance refused the request: {reply['error']}", file=sys.stderr)
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+if __name__ == "__main__" and os.name == "posix":
+    launch_args = parse_args(sys.argv)
+    if not (launch_args.headless or launch_args.new_instance) and \
+            quick_hand_off(launch_args.socket or INSTANCE_SOCKET, launch_args):
+        sys.exit(0)
+
+
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout,
-    QPushButton, QSpinBox, QDoubleSpinBox, QLabel, QHBoxLayout, QAction, QMessageBox, QWidgetAction, QMenuBar, QDialog
+    QPushButton, QSpinBox, QDoubleSpinBox, QLabel, QHBoxLayout, QAction, QMessageBox, QWidgetAction, QMenuBar, QDialog,
+    QMenu, QSystemTrayIcon, QComboBox, QFileDialog
 
 )
-from PyQt5.QtCore import Qt, QTimer, QUrl, QTime, QSize
-from PyQt5.QtGui import QPainter, QPen, QFont, QColor, QIcon, QPixmap, QPalette, QBrush
-from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent, QSoundEffect
+from PyQt5.QtCore import (
+    Qt, QCoreApplication, QObject, QTimer, QUrl, QTime, QDateTime, QSize, QEvent, QBuffer, QByteArray, QIODevice, pyqtSignal
+)
+from PyQt5.QtGui import (
+    QPainter, QPen, QFont, QColor, QIcon, QPixmap, QPalette, QBrush, QRegion, QFontMetrics, QImageReader, QPixmapCache
+)
+from PyQt5.QtNetwork import QAbstractSocket, QLocalServer, QLocalSocket
+
+# QtMultimedia is imported lazily (see load_multimedia) so it stays off the start-up path
 
 # for custom font, need to download a ttf file
 from PyQt5.QtGui import QFont, QFontDatabase
 
+IMPORTS_DONE = time.perf_counter()
+
 #must install python and pip, then run "install pyqt5"
 #install w icon to desktop:  pyinstaller --onefile --windowed --icon= "pathway to icon" pomodoro.py
 
-class CircularCountdown(QWidget):
-    def __init__(self, total_seconds=1500, finished_callback=None):  # default 25 min
-        super().__init__()
+# assets (fonts, images, sounds) live next to this file, or in the pyinstaller bundle dir when frozen
+ASSET_DIR = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+
+
+def asset_path(filename):
+    return os.path.join(ASSET_DIR, filename)   #resolves relative to the module instead of the CWD
+
+
+#time to first paint, split into phases (shown with --profile-startup)
+class StartupProfiler:
+    def __init__(self):
+        self.phases = {"imports": IMPORTS_DONE - IMPORT_START}   #phase -> seconds
+        self.later = {}     #phases added after the first paint (e.g. the multimedia warm-up), not part of its time
+        self.first_paint_at = None
+
+    def add(self, phase, seconds):
+        phases = self.phases if self.first_paint_at is None else self.later
+        phases[phase] = phases.get(phase, 0.0) + seconds
+
+    def first_paint(self):
+        if self.first_paint_at is None:
+            self.first_paint_at = time.perf_counter()
+
+    def report(self):
+        lines = ["startup profile:"]
+        for phase, seconds in self.phases.items():
+            lines.append(f"  {phase:<22} {seconds * 1000:8.1f} ms")
+        if self.first_paint_at is not None:
+            lines.append(f"  {'time to first paint':<22} {(self.first_paint_at - IMPORT_START) * 1000:8.1f} ms")
+        if self.later:
+            lines.append("after first paint:")
+            for phase, seconds in self.later.items():
+                lines.append(f"  {phase:<22} {seconds * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+
+startup = StartupProfiler()
+
+PERF_SAMPLES = 1024         #samples kept per channel (oldest overwritten)
+PERF_HEARTBEAT_MS = 100     #event-loop heartbeat while instrumentation is on
+PERF_STALL_MS = 50          #heartbeat lateness recorded as a stall
+PERF_CHANNELS = {           #channel -> how it is exported to the trace ("span": ends at its timestamp, "counter")
+    "paint_ms": "span",             #CircularCountdown.paintEvent
+    "tick_jitter_ms": "counter",    #countdown timeout vs the second boundary it was scheduled for
+    "stall_ms": "span",             #event loop blocked (heartbeat late by more than PERF_STALL_MS)
+    "modal_ms": "span",             #time spent inside a modal exec_() (nested event loop)
+    "audio_latency_ms": "counter",  #alarm play requested -> audio output active
+    "lofi_gap_ms": "counter",       #end of a lofi track -> next one playing
+}
+
+
+#fixed-size sample buffer: preallocated arrays, O(1) append, nothing allocated per sample
+class RingBuffer:
+    def __init__(self, size=PERF_SAMPLES):
+        self.size = size
+        self.times = array.array("d", [0.0]) * size     #perf_counter() of each sample
+        self.values = array.array("d", [0.0]) * size
+        self.count = 0      #samples ever appended; the next one goes to count % size
+
+    def append(self, at, value):
+        slot = self.count % self.size
+        self.times[slot] = at
+        self.values[slot] = value
+        self.count += 1
+
+    #(time, value) pairs still held, oldest first
+    def samples(self):
+        return [(self.times[i % self.size], self.values[i % self.size])
+                for i in range(max(0, self.count - self.size), self.count)]
+
+    def summary(self):
+        values = sorted(value for _, value in self.samples())
+        if not values:
+            return None
+        return {"count": self.count, "mean": sum(values) / len(values),
+                "p95": values[int(len(values) * 0.95)], "max": values[-1]}
+
+
+#opt-in hot-path instrumentation (--perf or View > Performance Overlay). call sites check `perf.enabled` first,
+#so when it is off the cost is one attribute lookup per paint/tick
+class PerfRecorder:
+    def __init__(self, size=PERF_SAMPLES):
+        self.enabled = False
+        self.channels = {name: RingBuffer(size) for name in PERF_CHANNELS}
+        self.heartbeat = None       #QTimer, created on first enable (needs a Q(Core)Application)
+        self.beat_due = None
+
+    def record(self, channel, value, at=None):
+        self.channels[channel].append(time.perf_counter() if at is None else at, value)
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if self.heartbeat is None:
+            self.heartbeat = QTimer()
+            self.heartbeat.setTimerType(Qt.PreciseTimer)
+            self.heartbeat.timeout.connect(self.beat)
+        if enabled:
+            self.beat_due = time.perf_counter() + PERF_HEARTBEAT_MS / 1000
+            self.heartbeat.start(PERF_HEARTBEAT_MS)
+        else:
+            self.heartbeat.stop()
+
+    #a beat that arrives late means the event loop could not run timers for that long
+    def beat(self):
+        now = time.perf_counter()
+        late_ms = (now - self.beat_due) * 1000
+        if late_ms > PERF_STALL_MS:
+            self.record("stall_ms", late_ms, now)
+        self.beat_due = now + PERF_HEARTBEAT_MS / 1000
+
+    def summary(self):
+        return {name: buffer.summary() for name, buffer in self.channels.items()}
+
+    #Chrome trace event format (open in chrome://tracing or ui.perfetto.dev); times in us since process start
+    def export_trace(self, path):
+        events = []
+        for name, buffer in self.channels.items():
+            for at, value in buffer.samples():
+                ts = (at - IMPORT_START) * 1e6
+                if PERF_CHANNELS[name] == "span":
+                    events.append({"name": name, "ph": "X", "ts": round(ts - value * 1000, 1),
+                                   "dur": round(value * 1000, 1), "pid": os.getpid(), "tid": 0})
+                else:
+                    events.append({"name": name, "ph": "C", "ts": round(ts, 1), "pid": os.getpid(),
+                                   "args": {"ms": round(value, 3)}})
+        events.sort(key=lambda event: event["ts"])
+        write_atomic(path, json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}))
+        return len(events)
+
+
+perf = PerfRecorder()
+
+QtMultimedia = None     #module once loaded, False if it is not available on this system
+multimedia_lock = threading.Lock()
+
+
+#imports QtMultimedia on first use (or from the warm-up thread started after the first frame)
+def load_multimedia():
+    global QtMultimedia
+    with multimedia_lock:
+        if QtMultimedia is None:
+            start = time.perf_counter()
+            try:
+                from PyQt5 import QtMultimedia as module
+            except ImportError as error:
+                print(f"audio disabled, QtMultimedia unavailable: {error}", file=sys.stderr)
+                module = False
+            QtMultimedia = module
+            startup.add("multimedia import", time.perf_counter() - start)
+    return QtMultimedia or None
+
+
+#process-wide cache so each font/image/sound is loaded from disk exactly once (paintEvent must never do file I/O)
+class AssetRegistry:
+    def __init__(self):
+        self._cache = {}    #(kind, key) -> loaded asset
+        self.hits = 0       #lookups served from the cache
+        self.misses = 0     #lookups that had to load from disk
+        self.background_keys = set()    #QPixmapCache keys of decoded backgrounds
+        self.load_seconds = 0.0         #time spent loading, for the startup profiler
+        self._loading = 0               #nesting depth, so a font loaded via its family is only timed once
+
+    def _lookup(self, kind, key, loader):
+        cache_key = (kind, key)
+        if cache_key in self._cache:
+            self.hits += 1
+        else:
+            self.misses += 1
+            start = time.perf_counter()
+            self._loading += 1
+            try:
+                self._cache[cache_key] = loader()
+            finally:
+                self._loading -= 1
+            if not self._loading:
+                self.load_seconds += time.perf_counter() - start
+        return self._cache[cache_key]
+
+    #registers a ttf with the QFontDatabase once and returns its family name
+    def font_family(self, filename):
+        def load():
+            font_id = QFontDatabase.addApplicationFont(asset_path(filename))
+            families = QFontDatabase.applicationFontFamilies(font_id)
+            return families[0] if families else QFont().family()   #falls back to default font if file is missing
+        return self._lookup("font_family", filename, load)
+
+    def font(self, filename, size):
+        return self._lookup("font", (filename, size), lambda: QFont(self.font_family(filename), size))
+
+    #file contents kept in memory (a few KB per jpg), so a released background can be decoded again without disk I/O
+    def encoded(self, filename):
+        def load():
+            with open(asset_path(filename), "rb") as image:
+                return QByteArray(image.read())
+        return self._lookup("encoded", filename, load)
+
+    #background image decoded straight at the size it is shown at (no full-size decode, no rescaling on paint);
+    #kept in the byte-bounded QPixmapCache, so least recently used backgrounds are evicted past IMAGE_CACHE_KB
+    def background(self, filename, size, dpr=1.0):
+        key = f"{filename}@{size.width()}x{size.height()}@{dpr}"
+        pixmap = QPixmapCache.find(key)
+        if pixmap is not None and not pixmap.isNull():
+            self.hits += 1
+            return pixmap
+        self.misses += 1
+        start = time.perf_counter()
+        QPixmapCache.setCacheLimit(IMAGE_CACHE_KB)    #only takes effect once QApplication exists, so set on use
+        data = QBuffer()
+        data.setData(self.encoded(filename))
+        reader = QImageReader(data, filename.rsplit(".", 1)[-1].encode())
+        reader.setScaledSize(size * dpr)
+        pixmap = QPixmap.fromImage(reader.read())
+        pixmap.setDevicePixelRatio(dpr)
+        QPixmapCache.insert(key, pixmap)
+        self.background_keys.add(key)
+        self.load_seconds += time.perf_counter() - start
+        return pixmap
+
+    #drops every decoded size of a background (its widgets must let go of their copies too for memory to be freed)
+    def release_background(self, filename):
+        for key in [key for key in self.background_keys if key.startswith(filename + "@")]:
+            QPixmapCache.remove(key)
+            self.background_keys.discard(key)
+
+    #bytes of decoded background images currently held by the cache
+    def background_bytes(self):
+        total = 0
+        for key in list(self.background_keys):
+            pixmap = QPixmapCache.find(key)
+            if pixmap is None or pixmap.isNull():
+                self.background_keys.discard(key)     #evicted
+            else:
+                total += pixmap.width() * pixmap.height() * pixmap.depth() // 8
+        return total
+
+    def icon(self, filename):
+        return self._lookup("icon", filename, lambda: QIcon(asset_path(filename)))
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "loaded": len(self._cache),
+                "background_bytes": self.background_bytes()}
+
+
+#fills the whole (fixed size) widget with a background image from the asset cache
+def add_background(widget, filename):
+    custom_bkgrnd = QLabel(widget)
+    custom_bkgrnd.setPixmap(assets.background(filename, widget.size(), widget.devicePixelRatioF()))
+    custom_bkgrnd.setGeometry(0, 0, widget.width(), widget.height())
+    custom_bkgrnd.lower()   #stays behind everything else
+    return custom_bkgrnd
+
+
+assets = AssetRegistry()    #shared by every widget; Qt objects are created lazily after QApplication exists
+
+IMAGE_CACHE_KB = 8 * 1024   #upper bound for decoded background images (QPixmapCache limit)
+
+# what happens when a session of each mode ends: mode -> (popup title, popup message, start next timer right away)
+# (which session comes next is looked up in the day's SessionTimeline)
+SESSION_TRANSITIONS = {
+    "work": ("Session Over!", "~~take a break~~", True),
+    "break": ("Break Over!", "~~back to work~~", False),
+    "long_break": ("Long Break Over!", "~~back to work~~", False),
+}
+MODE_TITLES = {
+    "work": "   ~~~~~work~~~~~  ",      #menu bar label for each mode
+    "break": "  ~~~~~break~~~~~  ",
+    "long_break": " ~~~long break~~~ ",
+}
+
+SMOOTH_ARC_FPS = 30     #frame rate of the "Smooth Arc" view option (e.g. 30 or 60)
+
+#deadline-based countdown: remaining time is computed from a monotonic clock instead of counting timer ticks,
+#so late or coalesced ticks (busy machine, modal popup open) never stretch a session
+class CountdownEngine:
+    def __init__(self, total_seconds, clock=time.monotonic):   #clock is injectable so drift can be simulated
+        self.clock = clock
         self.total_seconds = total_seconds
-        self.remaining_seconds = total_seconds
-        self.finished_callback = finished_callback
-        self.arc_color = QColor(233, 174, 130, 220)  # R, G, B, Alpha arc color of clock
+        self.deadline = None                    #clock() value when the countdown hits 0, None while paused/stopped
+        self.paused_remaining = float(total_seconds)
+        self.finished_at = None                 #deadline of the last countdown that ran out
 
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_timer)
-        self.setMinimumSize(300, 300)  # size of clock circle
+    @property
+    def running(self):
+        return self.deadline is not None
+
+    def remaining(self):
+        if self.deadline is None:
+            return self.paused_remaining
+        return max(0.0, self.deadline - self.clock())
+
+    #whole seconds shown on the clock (rounds up so a fresh 25 min session shows 25:00, not 24:59)
+    def remaining_seconds(self):
+        return math.ceil(self.remaining() - 1e-9)
 
-    def start(self, seconds=None):
+    #started_at lets a session chain onto the exact deadline of the previous one, so a late tick loses no time
+    def start(self, seconds=None, started_at=None):
         if seconds:
             self.total_seconds = seconds
-            self.remaining_seconds = seconds
-        self.timer.start(1000)    #times out every 1000 milliseconds or 1 second
-        self.update()
+            self.paused_remaining = float(seconds)
+        elif self.running:
+            return      #already counting down, keep the existing deadline
+        self.deadline = (self.clock() if started_at is None else started_at) + self.paused_remaining
 
     def pause(self):
-        self.timer.stop()
+        if self.running:
+            self.paused_remaining = self.remaining()    #freeze the time left, resume adds it back to a new deadline
+            self.deadline = None
+
+    def finish(self):
+        self.finished_at = self.deadline
+        self.paused_remaining = 0.0
+        self.deadline = None
 
     def reset(self, seconds=None):
         if seconds:
-            self.total_seconds = seconds            #if specified, will reset to new "seconds"
-            self.remaining_seconds = seconds
-        else:
-            self.remaining_seconds = self.total_seconds        #if not specified, will reset to last-set total seconds
+            self.total_seconds = seconds
+        self.paused_remaining = float(self.total_seconds)
+        self.deadline = None
+
+    #milliseconds until the displayed value next changes (the next whole-second boundary of the remaining time),
+    #or until the next multiple of `every` seconds when only e.g. minutes are shown
+    def ms_to_next_second(self, every=1):
+        remaining = self.remaining()
+        if remaining <= 0:
+            return 0
+        delay = remaining - (math.ceil(remaining / every - 1e-9) - 1) * every
+        return max(1, math.ceil(delay * 1000))
+
+
+#headless countdown: the deadline engine plus a timer that wakes on each displayed second (needs only QtCore)
+class CountdownTimer(QObject):
+    ticked = pyqtSignal()           #displayed second changed
+    state_changed = pyqtSignal()    #started, paused, reset or finished (not emitted for plain ticks)
+    finished = pyqtSignal()
+
+    def __init__(self, total_seconds=1500, clock=time.monotonic, parent=None):  # default 25 min
+        super().__init__(parent)
+        self.engine = CountdownEngine(total_seconds, clock)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)              #re-armed every tick to land on the next whole second
+        self.timer.setTimerType(Qt.PreciseTimer)    #default CoarseTimer may be 5% late per tick
+        self.timer.timeout.connect(self.update_timer)
+        self.tick_seconds = 1       #raised while nothing on screen shows seconds (tray mode)
+        self.tick_due = None        #perf_counter() the pending timeout was scheduled for (instrumentation only)
+
+    @property
+    def total_seconds(self):
+        return self.engine.total_seconds
+
+    @property
+    def remaining_seconds(self):
+        return self.engine.remaining_seconds()
+
+    def start(self, seconds=None, started_at=None):
+        self.engine.start(seconds, started_at)
+        self.schedule_tick()
+        self.state_changed.emit()
+
+    def pause(self):
+        self.engine.pause()
         self.timer.stop()
-        self.update()       #updates with new information
+        self.state_changed.emit()
+
+    def reset(self, seconds=None):
+        self.engine.reset(seconds)      #if seconds not specified, will reset to last-set total seconds
+        self.timer.stop()
+        self.state_changed.emit()
+
+    #picks up a saved countdown: paused with `remaining` left, or running towards a wall-clock (time.time())
+    #deadline, which already accounts for any time that passed while the app was not running
+    def restore(self, total_seconds, remaining, deadline=None):
+        if deadline is None:
+            self.engine.reset(total_seconds)
+            self.engine.paused_remaining = float(remaining)
+            self.timer.stop()
+            self.state_changed.emit()
+        else:
+            monotonic_deadline = self.engine.clock() + (deadline - time.time())
+            self.start(total_seconds, started_at=monotonic_deadline - total_seconds)   #finishes on the first tick if overdue
+
+    #ticked then fires once per `seconds` of remaining time (control API subscribers see the same rate);
+    #the finish still lands exactly on the deadline, as 0 is a multiple of any step
+    def set_tick_seconds(self, seconds):
+        self.tick_seconds = seconds
+        if self.engine.running:
+            self.schedule_tick()
+
+    def schedule_tick(self):
+        delay_ms = self.engine.ms_to_next_second(self.tick_seconds)
+        self.timer.start(delay_ms)
+        if perf.enabled:
+            self.tick_due = time.perf_counter() + delay_ms / 1000
 
     def update_timer(self):
-        if self.remaining_seconds > 0:
-            self.remaining_seconds -= 1  #when timeout is called (set up to be run every second), decreases remaining seconds by 1
+        if perf.enabled and self.tick_due is not None:
+            now = time.perf_counter()
+            perf.record("tick_jitter_ms", (now - self.tick_due) * 1000, now)
+            self.tick_due = None
+        if self.engine.remaining() > 0:
+            self.schedule_tick()    #next timeout lands on the next second boundary of the deadline
+            self.ticked.emit()
         else:
-            self.timer.stop()
-            if self.finished_callback:
-                self.finished_callback()   #in Main Window this calls session_finished which switches from work <-> break
-        self.update()  #reflect new time remaining
+            self.engine.finish()    #stops at exactly 0 remaining
+            self.state_changed.emit()
+            self.finished.emit()
+
+
+#a named work/break rhythm: long_break_every=0 means no long breaks (e.g. the "Set Custom Timer" pair)
+class Preset:
+    def __init__(self, name, work_minutes=25, break_minutes=5, long_break_minutes=15, long_break_every=4,
+                 pomodoros=8):
+        self.name = name
+        self.work_minutes = work_minutes
+        self.break_minutes = break_minutes
+        self.long_break_minutes = long_break_minutes
+        self.long_break_every = long_break_every
+        self.pomodoros = pomodoros      #work sessions planned per day
+
+    def to_dict(self):
+        return {"name": self.name, "work_minutes": self.work_minutes, "break_minutes": self.break_minutes,
+                "long_break_minutes": self.long_break_minutes, "long_break_every": self.long_break_every,
+                "pomodoros": self.pomodoros}
+
+    @classmethod
+    def from_dict(cls, name, fields):
+        long_break_every = int(fields.get("long_break_every", 4))
+        if long_break_every < 0:
+            raise ValueError(f"preset {name!r}: long_break_every must not be negative")
+        return cls(name, minutes(fields.get("work_minutes", 25)), minutes(fields.get("break_minutes", 5)),
+                   minutes(fields.get("long_break_minutes", 15)), long_break_every,
+                   max(1, int(fields.get("pomodoros", 8))))
+
+
+DEFAULT_PRESETS = {
+    "Classic (25 : 5)": Preset("Classic (25 : 5)"),
+    "Short (15 : 3)": Preset("Short (15 : 3)", 15, 3, 10, 4, 12),
+    "Deep Work (50 : 10)": Preset("Deep Work (50 : 10)", 50, 10, 30, 3, 6),
+}
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+#presets.json: {"presets": {name: {"work_minutes": .., ...}}, "plans": {"monday": name, ..., "default": name}}.
+#the user's presets are added to DEFAULT_PRESETS; a plan picks the preset a day starts with
+class PresetConfig:
+    def __init__(self, presets=None, plans=None):
+        self.presets = dict(DEFAULT_PRESETS, **(presets or {}))
+        self.plans = plans or {}
+
+    def preset_for(self, day):
+        name = self.plans.get(WEEKDAYS[day.weekday()]) or self.plans.get("default")
+        return self.presets.get(name) or next(iter(self.presets.values()))
+
+
+preset_configs = {}     #path -> (mtime, PresetConfig), so presets.json is parsed once (again only if edited)
+
+
+def load_presets(path):
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return PresetConfig()   #no config file, built-in presets only
+    cached = preset_configs.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(path, encoding="utf-8") as config_file:
+            config = json.load(config_file)
+        presets = {name: Preset.from_dict(name, fields) for name, fields in config.get("presets", {}).items()}
+        plans = {day.lower(): name for day, name in config.get("plans", {}).items()}
+        preset_config = PresetConfig(presets, plans)
+    except (OSError, ValueError, TypeError, AttributeError) as error:
+        print(f"ignoring {path}: {error}", file=sys.stderr)
+        preset_config = PresetConfig()
+    preset_configs[path] = (mtime, preset_config)
+    return preset_config
+
+
+#a day's sessions laid out up front from a preset, so a transition is just index + 1 (wrapping after the last).
+#each entry is (mode, seconds, pomodoro number); starts[i] is the planned offset of entry i from the first start
+class SessionTimeline:
+    def __init__(self, preset, day=None):
+        self.preset = preset
+        self.day = day or datetime.date.today()
+        sessions = []
+        for number in range(1, preset.pomodoros + 1):
+            sessions.append(("work", preset.work_minutes * 60, number))
+            if preset.long_break_every and number % preset.long_break_every == 0:
+                sessions.append(("long_break", preset.long_break_minutes * 60, number))
+            else:
+                sessions.append(("break", preset.break_minutes * 60, number))
+        self.sessions = tuple(sessions)
+        starts = [0]
+        for _, seconds, _ in sessions[:-1]:
+            starts.append(starts[-1] + seconds)
+        self.starts = tuple(starts)
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __getitem__(self, index):
+        return self.sessions[index % len(self.sessions)]
+
+    #what comes after `index`, for status consumers (e.g. "next: long break")
+    def upcoming(self, index, count=3):
+        return [self[index + offset] for offset in range(1, count + 1)]
+
+
+#the work/break state machine, independent of any widget (runs under QCoreApplication for the headless mode).
+#the current session is an index into the day's SessionTimeline, which the countdown and status both read
+class PomodoroCore(QObject):
+    session_finished = pyqtSignal(str, int)     #finished mode and its length in seconds; next session already set
+
+    def __init__(self, clock=time.monotonic, parent=None, config=None):
+        super().__init__(parent)
+        self.config = config or PresetConfig()
+        self.planned = True     #preset comes from the day's plan (False once the user picked one)
+        self.timeline = SessionTimeline(self.config.preset_for(datetime.date.today()))
+        self.index = 0
+        self.countdown = CountdownTimer(self.timeline[0][1], clock, self)
+        self.countdown.finished.connect(self.countdown_finished)
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
+    @property
+    def preset(self):
+        return self.timeline.preset
 
-        rect = self.rect().adjusted(10, 10, -10, -90)  #padding of arc and timer from window sides
+    @property
+    def mode(self):
+        return self.timeline[self.index][0]
 
-        # background circle
-        pen_bg = QPen(QColor(222, 165, 122, 110), 20)  #color of second arc (when time has elapsed)
-        painter.setPen(pen_bg)
-        painter.drawArc(rect, 0, 360 * 16)
+    @property
+    def work_minutes(self):
+        return self.preset.work_minutes
 
-        # progress arc
-        if self.total_seconds > 0:
-            angle_span = int(360 * (self.remaining_seconds / self.total_seconds))
+    @property
+    def break_minutes(self):
+        return self.preset.break_minutes
+
+    def start(self):
+        self.countdown.start()
+
+    def pause(self):
+        self.countdown.pause()
+
+    def reset(self):
+        self.countdown.reset(self.timeline[self.index][1])     #does not start the clock
+
+    #switches to a preset (rebuilding the day's timeline); goes back to a (not started) first work session
+    def set_preset(self, preset, planned=False):
+        self.planned = planned
+        self.timeline = SessionTimeline(preset)
+        self.index = 0
+        self.countdown.reset(self.timeline[0][1])
+
+    #new work/break lengths without long breaks (the "Set Custom Timer" pair)
+    def set_durations(self, work_minutes, break_minutes):
+        self.set_preset(Preset("Custom", work_minutes, break_minutes, long_break_every=0,
+                               pomodoros=self.preset.pomodoros))
+
+    #moves to the next timeline entry and starts its deadline right away if it is a break, chained onto the
+    #exact end of the last one. the first transition of a new day switches to that day's plan
+    def countdown_finished(self):
+        finished_mode = self.mode
+        finished_seconds = round(self.countdown.total_seconds)
+        finished_at = self.countdown.engine.finished_at
+        autostart = SESSION_TRANSITIONS[finished_mode][2]
+        today = datetime.date.today()
+        if self.timeline.day != today:
+            self.timeline = SessionTimeline(self.config.preset_for(today) if self.planned else self.preset, today)
+            self.index = 0 if finished_mode == "work" else -1    #a work session that spans midnight is still followed by a break
+        self.index = (self.index + 1) % len(self.timeline)
+        _, seconds, _ = self.timeline[self.index]
+        if autostart:
+            self.countdown.start(seconds, started_at=finished_at)    #after work, DOES start break timer
         else:
-            angle_span = 0
-        pen_fg = QPen(self.arc_color, 15)
-        painter.setPen(pen_fg)
-        painter.drawArc(rect, 90 * 16, -angle_span * 16)
+            self.countdown.reset(seconds)       #after a break, does NOT start work timer
+        self.session_finished.emit(finished_mode, finished_seconds)
+
+    #seconds of the current session already counted down
+    def elapsed_seconds(self):
+        return round(self.countdown.total_seconds - self.countdown.engine.remaining())
+
+    def status(self):
+        engine = self.countdown.engine
+        mode, _, pomodoro = self.timeline[self.index]
+        return {
+            "mode": mode,
+            "running": engine.running,
+            "remaining": round(engine.remaining(), 3),
+            "total_seconds": engine.total_seconds,
+            "work_minutes": self.work_minutes,
+            "break_minutes": self.break_minutes,
+            "preset": self.preset.name,
+            "session": self.index + 1,
+            "sessions": len(self.timeline),
+            "pomodoro": pomodoro,
+            "next": self.timeline[self.index + 1][0],
+        }
+
+    #what is needed to pick the countdown back up after a crash or reboot
+    def snapshot(self):
+        engine = self.countdown.engine
+        return {
+            "mode": self.mode,
+            "work_minutes": self.work_minutes,
+            "break_minutes": self.break_minutes,
+            "preset": self.preset.to_dict(),
+            "planned": self.planned,
+            "index": self.index,
+            "day": self.timeline.day.isoformat(),
+            "total_seconds": engine.total_seconds,
+            "remaining": round(engine.remaining(), 1),
+            "deadline": round(time.time() + engine.remaining(), 1) if engine.running else None,   #wall clock
+        }
+
+    def restore(self, state):
+        try:
+            if "preset" in state:
+                preset = Preset.from_dict(state["preset"]["name"], state["preset"])
+                day = datetime.date.fromisoformat(state["day"])     #an older day rolls over on the next transition
+                index = int(state["index"])
+                planned = bool(state["planned"])
+            else:   #saved before presets existed: a plain work/break pair
+                preset = Preset("Custom", state["work_minutes"], state["break_minutes"], long_break_every=0)
+                day = None
+                index = 1 if state["mode"] == "break" else 0
+                planned = False
+            self.timeline = SessionTimeline(preset, day)
+            self.index = index % len(self.timeline)
+            self.planned = planned
+            self.countdown.restore(state["total_seconds"], state["remaining"], state["deadline"])
+        except (KeyError, TypeError, ValueError):
+            pass    #saved by an incompatible version, keep the defaults
+
+
+#True if some process is accepting connections on this local socket name
+def server_alive(name, timeout_ms=200):
+    socket = QLocalSocket()
+    socket.connectToServer(name)
+    alive = socket.waitForConnected(timeout_ms)
+    socket.abort()
+    return alive
+
+
+DEFAULT_TIMER = "0"     #timer addressed by requests without an "id"
+
+
+#local control API for PomodoroCores: JSON lines over a QLocalServer socket (Unix socket, named pipe on Windows).
+#requests: {"cmd": "start" | "pause" | "reset" | "status" | "subscribe" | "set" | "preset" | "timeline" | "perf"
+#           | "activate" | "create" | "remove" | "list", "id": "...", ...}
+#"id" picks one of the hosted timers (default "0"); "create"/"remove" add and drop timers where a factory is given
+#replies:  {"ok": true, "id": "...", "status": {...}}  or  {"ok": false, "error": "..."}
+#after "subscribe", {"event": "state" | "tick" | "session_finished", "id": "...", "status": {...}} lines are pushed
+#for that timer as they happen
+class ControlServer(QObject):
+    def __init__(self, core, name, parent=None, activate=None, new_core=None):
+        super().__init__(parent)
+        self.activate = activate    #brings the window forward on "activate" (None when headless)
+        self.new_core = new_core    #builds the timer for "create" (None when the instance hosts one timer)
+        self.clients = []       #keeps the sockets' Python wrappers (and their connected slots) alive
+        self.cores = {}         #timer id -> PomodoroCore
+        self.subscribers = {}   #timer id -> sockets subscribed to its events
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)     #only this user may connect
+        if not self.server.listen(name) and self.server.serverError() == QAbstractSocket.AddressInUseError \
+                and not server_alive(name):
+            QLocalServer.removeServer(name)     #stale socket left behind by a crashed instance
+            self.server.listen(name)
+        if not self.server.isListening():
+            raise OSError(f"cannot listen on {name}: {self.server.errorString()}")
+        self.server.newConnection.connect(self.accept)
+        self.add_core(DEFAULT_TIMER, core)
+
+    def add_core(self, timer_id, core):
+        self.cores[timer_id] = core
+        self.subscribers[timer_id] = []
+        core.countdown.state_changed.connect(lambda: self.broadcast(timer_id, "state"))
+        core.countdown.ticked.connect(lambda: self.broadcast(timer_id, "tick"))
+        core.session_finished.connect(
+            lambda mode, seconds: self.broadcast(timer_id, "session_finished", finished=mode))
+
+    def accept(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self.clients.append(socket)
+            socket.readyRead.connect(lambda socket=socket: self.read(socket))
+            socket.disconnected.connect(lambda socket=socket: self.drop(socket))
+            self.read(socket)   #requests that arrived before readyRead was connected
+
+    def drop(self, socket):
+        for subscribers in self.subscribers.values():
+            if socket in subscribers:
+                subscribers.remove(socket)
+        self.clients.remove(socket)
+        socket.deleteLater()
+
+    def read(self, socket):
+        while socket.canReadLine():
+            line = bytes(socket.readLine()).strip()
+            if not line:
+                continue
+            try:
+                reply = self.handle(json.loads(line), socket)
+            except (ValueError, TypeError, KeyError) as error:
+                reply = {"ok": False, "error": str(error)}
+            socket.write(json.dumps(reply).encode() + b"\n")
+
+    def handle(self, request, socket):
+        command = request["cmd"]
+        timer_id = str(request.get("id", DEFAULT_TIMER))
+        if command == "list":
+            return {"ok": True, "timers": list(self.cores)}
+        if command == "create":
+            if self.new_core is None:
+                raise ValueError("this instance hosts a single timer")
+            if timer_id in self.cores:
+                raise ValueError(f"timer {timer_id!r} already exists")
+            self.add_core(timer_id, self.new_core())
+        if timer_id not in self.cores:
+            raise ValueError(f"unknown timer {timer_id!r}")
+        core = self.cores[timer_id]
+        if command == "start":
+            core.start()
+        elif command == "pause":
+            core.pause()
+        elif command == "reset":
+            core.reset()
+        elif command == "set":
+            core.set_durations(minutes(request["work_minutes"]), minutes(request["break_minutes"]))
+        elif command == "preset":
+            if request["name"] not in core.config.presets:
+                raise ValueError(f"unknown preset {request['name']!r}")
+            core.set_preset(core.config.presets[request["name"]])
+        elif command == "timeline":
+            timeline = core.timeline
+            return {"ok": True, "id": timer_id, "status": core.status(), "day": timeline.day.isoformat(),
+                    "timeline": [{"mode": mode, "seconds": seconds, "pomodoro": pomodoro, "start": start}
+                                 for (mode, seconds, pomodoro), start in zip(timeline.sessions, timeline.starts)]}
+        elif command == "subscribe":
+            if socket not in self.subscribers[timer_id]:
+                self.subscribers[timer_id].append(socket)
+        elif command == "perf":
+            return {"ok": True, "id": timer_id, "status": core.status(), "enabled": perf.enabled,
+                    "perf": perf.summary()}
+        elif command == "activate":
+            if self.activate:
+                self.activate()
+        elif command == "remove":
+            if self.new_core is None or timer_id == DEFAULT_TIMER:
+                raise ValueError(f"timer {timer_id!r} cannot be removed")
+            del self.cores[timer_id], self.subscribers[timer_id]
+            core.pause()
+            core.deleteLater()
+            return {"ok": True, "id": timer_id}
+        elif command not in ("status", "create"):
+            raise ValueError(f"unknown command {command!r}")
+        return {"ok": True, "id": timer_id, "status": core.status()}
+
+    #the event is encoded once and written to every subscriber of that timer
+    def broadcast(self, timer_id, event, **fields):
+        subscribers = self.subscribers.get(timer_id)
+        if not subscribers:
+            return
+        payload = json.dumps({"event": event, "id": timer_id, "status": self.cores[timer_id].status(),
+                              **fields}).encode() + b"\n"
+        for socket in subscribers:
+            socket.write(payload)
+
+
+#draws a CountdownTimer as a ring + digits
+class CircularCountdown(QWidget):
+    def __init__(self, total_seconds=1500, clock=time.monotonic, countdown_timer=None):
+        super().__init__()
+        self.countdown_timer = countdown_timer or CountdownTimer(total_seconds, clock, self)
+        self.engine = self.countdown_timer.engine
+        self.timer = self.countdown_timer.timer
+        self.arc_color = QColor(233, 174, 130, 220)  # R, G, B, Alpha arc color of clock
+        self.bg_pen = QPen(QColor(222, 165, 122, 110), 20)  #color of second arc (when time has elapsed)
+        self.text_color = QColor(249, 186, 94)  #color of timer font
+        self.text_font = assets.font("DS-DIGIT.TTF", 40)  # size of timer font
+        self.static_layer = None    #built on first paint
+        self.painted_angle = None
+        self.setMinimumSize(300, 300)  # size of clock circle
 
-        # countdown text
-        painter.setPen(QColor(249, 186, 94))  #color of timer font
-        font_id = QFontDatabase.addApplicationFont("DS-DIGIT.TTF")  #replace with file path
-        font_family = QFontDatabase.applicationFontFamilies(font_id)[0]
-        painter.setFont(QFont(font_family, 40))  # size of timer font
+        # optional smooth arc: repaints the ring between second ticks, off (None) by default
+        self.animation_fps = None       #requested frame rate
+        self.current_fps = None         #frame rate actually used, lowered when paints go over budget
+        self.paint_ms = 0.0             #moving average of paint time
+        self.frames_under_budget = 0
+        self.animation_timer = QTimer(self)
+        self.animation_timer.setTimerType(Qt.PreciseTimer)
+        self.animation_timer.timeout.connect(self.animate)
+
+        self.countdown_timer.ticked.connect(self.timer_ticked)
+        self.countdown_timer.state_changed.connect(self.timer_state_changed)
+
+    @property
+    def total_seconds(self):
+        return self.engine.total_seconds
+
+    @property
+    def remaining_seconds(self):
+        return self.engine.remaining_seconds()
+
+    def start(self, seconds=None, started_at=None):
+        self.countdown_timer.start(seconds, started_at)
+
+    def pause(self):
+        self.countdown_timer.pause()
+
+    def reset(self, seconds=None):
+        self.countdown_timer.reset(seconds)
+
+    def restore(self, total_seconds, remaining, deadline=None):
+        self.countdown_timer.restore(total_seconds, remaining, deadline)
+
+    def timer_ticked(self):
+        self.update_animation()     #picks the smooth arc back up once the window is visible again
+        self.update(self.dirty_region())  #reflect new time remaining, repainting only what changed
+
+    def timer_state_changed(self):
+        self.update_animation()
+        self.update()       #updates with new information
+
+    #fps=None turns the smooth arc off (arc then moves once per second, in whole degrees)
+    def set_animation_fps(self, fps=None):
+        self.animation_fps = fps
+        self.current_fps = fps
+        self.frames_under_budget = 0
+        self.update_animation()
+        self.update()
+
+    #animate only while counting down and actually on screen; hidden/minimized/occluded falls back to the 1 Hz tick
+    def update_animation(self):
+        window = self.window().windowHandle()
+        on_screen = not self.visibleRegion().isEmpty() and window is not None and window.isExposed()
+        if self.animation_fps and self.engine.running and on_screen:
+            interval = round(1000 / self.current_fps)
+            if not self.animation_timer.isActive() or self.animation_timer.interval() != interval:
+                self.animation_timer.start(interval)
+        else:
+            self.animation_timer.stop()
+
+    def animate(self):
+        self.update_animation()
+        if self.animation_timer.isActive() and self.arc_span() != self.painted_angle:
+            self.update(self.ring_region if self.static_layer is not None else self.rect())
+
+    #paints over a quarter of the frame interval halve the rate; a second's worth of cheap paints doubles it back
+    def track_paint_time(self, ms):
+        self.paint_ms = 0.8 * self.paint_ms + 0.2 * ms
+        if not self.animation_fps:
+            return
+        budget = 250 / self.current_fps
+        if self.paint_ms > budget and self.current_fps > 1:
+            self.current_fps = max(1, self.current_fps // 2)
+            self.frames_under_budget = 0
+        elif self.paint_ms < budget / 4 and self.current_fps < self.animation_fps:
+            self.frames_under_budget += 1
+            if self.frames_under_budget >= self.current_fps:
+                self.current_fps = min(self.animation_fps, self.current_fps * 2)
+                self.frames_under_budget = 0
+        else:
+            self.frames_under_budget = 0
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        QTimer.singleShot(0, self.update_animation)     #after the window has been exposed
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.animation_timer.stop()
+
+    #span of the remaining-time arc in 1/16 degrees; whole degrees per second, or interpolated in smooth mode
+    def arc_span(self):
+        if self.total_seconds <= 0:
+            return 0
+        if self.animation_timer.isActive():
+            return int(360 * 16 * (self.engine.remaining() / self.total_seconds))
+        return int(360 * (self.remaining_seconds / self.total_seconds)) * 16
+
+    def countdown_text(self):
         minutes = self.remaining_seconds // 60
         seconds = self.remaining_seconds % 60
-        text = f"{minutes:02}:{seconds:02}"
-        text_rect = rect.adjusted(0, 0, 0, 0)  # move text inside circle
-        painter.drawText(text_rect, Qt.AlignCenter, text)
+        return f"{minutes:02}:{seconds:02}"
+
+    #static layer (background circle) + layout rects, rebuilt only on resize, theme or screen change
+    def build_static_layer(self):
+        dpr = self.devicePixelRatioF()
+        self.arc_rect = self.rect().adjusted(10, 10, -10, -90)  #padding of arc and timer from window sides
+        self.fg_pen = QPen(self.arc_color, 15)
+
+        self.static_layer = QPixmap(self.size() * dpr)     #drawn at device resolution so it stays sharp on hi-dpi screens
+        self.static_layer.setDevicePixelRatio(dpr)
+        self.static_layer.fill(Qt.transparent)
+        painter = QPainter(self.static_layer)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(self.bg_pen)
+        painter.drawArc(self.arc_rect, 0, 360 * 16)
+        painter.end()
+
+        # dirty areas: the ring (arc changes) and the box around the text (digits change)
+        outer = self.arc_rect.adjusted(-12, -12, 12, 12)
+        inner = self.arc_rect.adjusted(12, 12, -12, -12)
+        self.ring_region = QRegion(outer, QRegion.Ellipse).subtracted(QRegion(inner, QRegion.Ellipse))
+        metrics = QFontMetrics(self.text_font)
+        self.text_rect = metrics.boundingRect(self.arc_rect, Qt.AlignCenter, "888:88").adjusted(-4, -4, 4, 4)
+
+    def invalidate_static_layer(self):
+        self.static_layer = None
+        self.update()
+
+    def resizeEvent(self, event):
+        self.invalidate_static_layer()
+        super().resizeEvent(event)
+
+    def changeEvent(self, event):
+        if event.type() in (QEvent.PaletteChange, QEvent.StyleChange):
+            self.invalidate_static_layer()
+        super().changeEvent(event)
+
+    #only the parts that changed since the last paint: digits always, ring only if the arc moved a degree
+    def dirty_region(self):
+        if self.static_layer is None:
+            return QRegion(self.rect())
+        region = QRegion(self.text_rect)
+        if self.arc_span() != self.painted_angle:
+            region = region.united(self.ring_region)
+        return region
+
+    def paintEvent(self, event):
+        paint_start = time.perf_counter()
+        if self.static_layer is None or self.static_layer.devicePixelRatio() != self.devicePixelRatioF():
+            self.build_static_layer()
+
+        painter = QPainter(self)
+        painter.setClipRegion(event.region())
+        painter.drawPixmap(0, 0, self.static_layer)    # background circle (cached)
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        # progress arc
+        arc_span = self.arc_span()
+        painter.setPen(self.fg_pen)
+        painter.drawArc(self.arc_rect, 90 * 16, -arc_span)
+        self.painted_angle = arc_span
+
+        # countdown text
+        painter.setPen(self.text_color)
+        painter.setFont(self.text_font)
+        painter.drawText(self.arc_rect, Qt.AlignCenter, self.countdown_text())
+        painter.end()
+        paint_ms = (time.perf_counter() - paint_start) * 1000
+        self.track_paint_time(paint_ms)
+        if perf.enabled:
+            perf.record("paint_ms", paint_ms)
+
+CLOCK_RECHECK_MS = 10000    #longest the clock sleeps, so a wall-clock change or resume from sleep shows within 10 s
 
 #based on a tutorial by Brocode on YouTube
 class DigitalClock(QWidget):
@@ -101,49 +1086,180 @@ class DigitalClock(QWidget):
             "color: rgba(235, 152, 162, 250);")     #Color of clock font
 
         # custom font
-        font_id = QFontDatabase.addApplicationFont("DS-DIGIT.TTF")   #replace with file path
-        font_family = QFontDatabase.applicationFontFamilies(font_id)[0]
-        my_font = QFont(font_family, 35)  # second param is font size
-        self.time_label.setFont(my_font)
+        self.time_label.setFont(assets.font("DS-DIGIT.TTF", 35))  # second param is font size
+
+        # the "hh:mm AP" text only changes once a minute, so wake on minute boundaries (re-checked every
+        # CLOCK_RECHECK_MS in case the wall clock jumps) instead of every second
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.PreciseTimer)   #coarse timers may fire up to 3 s late on a 60 s interval
+        self.timer.timeout.connect(self.update_time)
 
-        self.timer.timeout.connect(self.update_time)  # trigger timeout every second
-        self.timer.start(1000)  # 1000 miliseconds
+        self.wakeups = 0        #timer wakeups, to compare idle cost
+        self.text_updates = 0   #setText calls that actually changed the label
+        self.clock_jumps = 0    #wall-clock jumps/system sleeps detected on wakeup
+        self.last_wall_ms = None
+        self.last_monotonic = None
 
         self.update_time()  # used to display time when program started
 
+    #re-arms the single-shot timer to just after the next wall-clock minute boundary, or sooner for a re-check:
+    #the timer runs on monotonic time, so a wall-clock change is only noticed on the next wakeup
+    def schedule_next_minute(self):
+        now = QTime.currentTime()
+        ms_into_minute = now.second() * 1000 + now.msec()
+        self.timer.start(min(60000 - ms_into_minute + 5, CLOCK_RECHECK_MS))    #5 ms past the boundary so the new minute is already showing
+
     def update_time(self):
+        self.wakeups += 1
+        # wall clock moved differently than the monotonic clock -> system slept or the clock was changed
+        wall_ms = QDateTime.currentMSecsSinceEpoch()
+        monotonic = time.monotonic()
+        if self.last_wall_ms is not None:
+            expected_ms = self.last_wall_ms + (monotonic - self.last_monotonic) * 1000
+            if abs(wall_ms - expected_ms) > 1000:
+                self.clock_jumps += 1
+        self.last_wall_ms = wall_ms
+        self.last_monotonic = monotonic
+
         current_time = QTime.currentTime().toString(
             "hh:mm AP")  # design layout of time; AP turns from 24hr to 12hr with AM/PM label
         # hh mm ss are format specifiers
-        self.time_label.setText(current_time)
+        if current_time != self.time_label.text():     #skip the relayout if the minute has not changed
+            self.time_label.setText(current_time)
+            self.text_updates += 1
+
+        if self.isVisible():
+            self.schedule_next_minute()     #always computed from the current wall clock, so jumps catch up here
+
+    #no wakeups at all while hidden; showing again refreshes immediately and re-aligns to the minute
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.update_time()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.timer.stop()
+
+
+#debug overlay over the main window (View > Performance Overlay): one line per instrumentation channel,
+#refreshed twice a second while shown
+class PerfOverlay(QLabel):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)     #clicks go through to the window
+        self.setStyleSheet("background-color: rgba(0, 0, 0, 170); color: white; font-family: monospace; "
+                           "font-size: 11px; padding: 4px")
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def refresh(self):
+        lines = [f"{'channel':<17}{'avg':>8}{'p95':>8}{'max':>8}{'n':>7}"]
+        for name, summary in perf.summary().items():
+            if summary is None:
+                lines.append(f"{name:<17}{'-':>8}")
+            else:
+                lines.append(f"{name:<17}{summary['mean']:8.2f}{summary['p95']:8.2f}{summary['max']:8.2f}"
+                             f"{summary['count']:7d}")
+        self.setText("\n".join(lines))
+        self.adjustSize()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.raise_()
+        self.timer.start(500)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.timer.stop()
+
+
+#mini mode: remaining minutes drawn into a small tray icon instead of the whole window.
+#redrawn only when the shown minute, mode or running state changes (at most once a minute while running)
+class TrayIcon(QSystemTrayIcon):
+    SIZE = 32   #icon pixels, the platform scales it to the tray
+
+    def __init__(self, core, parent=None):
+        super().__init__(parent)
+        self.core = core
+        self.shown = None       #(mode, minutes, running) currently drawn
+        self.redraws = 0        #icon renders, to compare idle cost
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)              #re-armed for the next minute boundary of the remaining time
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.refresh)
+        core.countdown.state_changed.connect(self.refresh)
+
+    def render(self, minutes, fraction, running):
+        pixmap = QPixmap(self.SIZE, self.SIZE)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(QPen(QColor(222, 165, 122, 110 if running else 60), 4))   #same colors as CircularCountdown
+        painter.drawEllipse(2, 2, self.SIZE - 4, self.SIZE - 4)
+        painter.setPen(QPen(QColor(233, 174, 130, 220 if running else 120), 4))
+        painter.drawArc(2, 2, self.SIZE - 4, self.SIZE - 4, 90 * 16, -int(360 * 16 * fraction))
+        font = QFont(assets.font_family("DS-DIGIT.TTF"))
+        font.setPixelSize(18 if minutes < 100 else 12)
+        painter.setFont(font)
+        painter.setPen(QColor(249, 186, 94))
+        painter.drawText(pixmap.rect(), Qt.AlignCenter, str(minutes))
+        painter.end()
+        return pixmap
+
+    def refresh(self):
+        self.timer.stop()
+        if not self.isVisible():
+            return
+        engine = self.core.countdown.engine
+        remaining = engine.remaining()
+        minutes = math.ceil(remaining / 60 - 1e-9)
+        shown = (self.core.mode, minutes, engine.running)
+        if shown != self.shown:
+            self.shown = shown
+            self.setIcon(QIcon(self.render(minutes, remaining / max(1, engine.total_seconds), engine.running)))
+            state = "" if engine.running else " (paused)"
+            self.setToolTip(f"Pomodoro - {self.core.mode.replace('_', ' ')}: {minutes} min left{state}")
+            self.redraws += 1
+        if engine.running and remaining > 0:
+            self.timer.start(engine.ms_to_next_second(60))
+
+    def show(self):
+        super().show()
+        self.refresh()
+
+    def hide(self):
+        super().hide()
+        self.timer.stop()
+        self.shown = None
+
 
 # used for when work and break cycles finish
 class CustomMessage(QDialog):
+    BACKGROUND = "trains_popup_msg.jpg"
+    FIXED_SIZE = QSize(400, 230)
+
     def __init__(self, title, message, parent=None, icon=None):
         super().__init__(parent)
         self.setWindowTitle(title)
         self.setModal(True)  # block input until closed
         self.setGeometry(2473, 197, 400, 230)   #position of work/break popup on screen
-        self.setFixedSize(400, 230)             #locks dimensions of popup window
+        self.setFixedSize(self.FIXED_SIZE)      #locks dimensions of popup window
 
 
         #setting background of popup message (custom jpg to match background)
-        og_pixmap = QPixmap("trains_popup_msg.jpg") #replace with file path
-        custom_bkgrnd = QLabel(self)
-        custom_bkgrnd.setPixmap(og_pixmap)
-        custom_bkgrnd.setScaledContents(True)
-        custom_bkgrnd.setGeometry(0, 0, self.width(), self.height())   #scales to fit QDialog dimensions defined above (400 x 230)
+        add_background(self, self.BACKGROUND)   #decoded at the QDialog dimensions defined above (400 x 230)
 
         if icon:
-            self.setWindowIcon(QIcon(icon))         #sets the icon; can use the same as Main Window or None
+            self.setWindowIcon(assets.icon(icon))         #sets the icon; can use the same as Main Window or None
 
         #Layout
         layout = QVBoxLayout()
         layout.setAlignment(Qt.AlignCenter)
 
         # message label
-        label = QLabel(message)
-        label.setStyleSheet(
+        self.label = QLabel(message)
+        self.label.setStyleSheet(
             "font-family: Magneto; font-size: 40px; color: rgba(250, 173, 90, 210); background: transparent;")
 
         # ok/close button
@@ -153,27 +1269,32 @@ class CustomMessage(QDialog):
         ok_button.clicked.connect(self.accept)  #closes the QDialog instance
 
         #set center-aligned layout of label -> space -> ok button
-        layout.addWidget(label, alignment=Qt.AlignCenter)
+        layout.addWidget(self.label, alignment=Qt.AlignCenter)
         layout.addSpacing(10)   #adds spacing between label and button)
         layout.addWidget(ok_button, alignment=Qt.AlignCenter)
 
         self.setLayout(layout)
 
+    #reuses an already open popup for a newer transition instead of stacking another one
+    def set_message(self, title, message):
+        self.setWindowTitle(title)
+        self.label.setText(message)
+
 #used for setting a custom timer menu (default, spin boxes, ok and cancel buttons)
 class CustomTimer(QDialog):
-    def __init__(self, parent=None):
+    BACKGROUND = "trains_popup_ct.jpg"
+    FIXED_SIZE = QSize(400, 270)
+
+    def __init__(self, parent=None, presets=None):
         super().__init__(parent)
+        self.presets = presets or DEFAULT_PRESETS   #name -> Preset, offered in the preset box
         self.setWindowTitle(" ")
         self.setModal(True)  # block input until closed
         self.setGeometry(2473, 197, 400, 270)    #sets position on screen
-        self.setFixedSize(400, 270)             #locks dimensions to be 400x270
+        self.setFixedSize(self.FIXED_SIZE)      #locks dimensions to be 400x270
 
         #background of set custom timer popup (custom jpg to match background)
-        og_pixmap = QPixmap("trains_popup_ct.jpg")  #replace with file path
-        custom_bkgrnd = QLabel(self)
-        custom_bkgrnd.setPixmap(og_pixmap)
-        custom_bkgrnd.setScaledContents(True)
-        custom_bkgrnd.setGeometry(0, 0, self.width(), self.height())   #scales background to Dialog defined size (400x270)
+        add_background(self, self.BACKGROUND)   #decoded at the Dialog defined size (400x270)
 
         # Labels for time inputs
         work_label = QLabel("Work:")
@@ -196,10 +1317,18 @@ class CustomTimer(QDialog):
         self.break_spin.setSpecialValueText(" ")  # sets min val of 0 to " "
         self.break_spin.setValue(0)
 
+        # Preset box (fills the spin boxes; accepting unchanged values keeps the preset's long breaks)
+        self.preset_box = QComboBox()
+        self.preset_box.addItem("Custom")
+        self.preset_box.addItems(list(self.presets))
+        self.preset_box.setStyleSheet("font-family: Georgia; font-size: 16px")
+        self.preset_box.currentTextChanged.connect(self.preset_selected)
+
         #buttons
         defaultpom_button = QPushButton("Default (25 : 5)")
         defaultpom_button.clicked.connect(lambda: self.work_spin.setValue(25))  #Lambda needed so function call does not run until btn clicked
         defaultpom_button.clicked.connect(lambda: self.break_spin.setValue(5))
+        defaultpom_button.clicked.connect(lambda: self.preset_box.setCurrentText("Custom"))    #plain pair, no long breaks
         defaultpom_button.clicked.connect(self.accept)      #should also accept to uphold condition in set_custom_time method in MainWindow
 
         ok_button = QPushButton("OK")
@@ -223,6 +1352,7 @@ class CustomTimer(QDialog):
         button_layout.addWidget(cancel_button)
 
         layout.addWidget(defaultpom_button)
+        layout.addWidget(self.preset_box)
         layout.addLayout(work_input_layout)
         layout.addLayout(break_input_layout)
 
@@ -234,9 +1364,567 @@ class CustomTimer(QDialog):
     def get_break_value(self):
         return self.break_spin.value()  #returns value from work spin box or overriden value by default pomodoro
 
+    def preset_selected(self, name):
+        if name in self.presets:
+            self.work_spin.setValue(self.presets[name].work_minutes)
+            self.break_spin.setValue(self.presets[name].break_minutes)
+
+    #the chosen preset, or None once its work/break values were edited (a plain custom pair)
+    def get_preset_name(self):
+        preset = self.presets.get(self.preset_box.currentText())
+        if preset and (preset.work_minutes, preset.break_minutes) == (self.get_work_value(), self.get_break_value()):
+            return preset.name
+        return None
+
+
+LOFI_EXTENSIONS = (".wav", ".mp3", ".ogg", ".flac", ".m4a", ".aac")
+
+
+#default lofi source: a "lofi" folder or "lofi.m3u" next to the app, else the single lofi.wav
+def default_lofi_source():
+    for name in ("lofi", "lofi.m3u"):
+        if os.path.exists(asset_path(name)):
+            return asset_path(name)
+    return asset_path("lofi.wav")
+
+
+#track paths from a directory (sorted), an M3U playlist (relative entries resolve next to it) or a single file
+def load_tracks(source):
+    if os.path.isdir(source):
+        return [os.path.join(source, name) for name in sorted(os.listdir(source))
+                if name.lower().endswith(LOFI_EXTENSIONS)]
+    if source.lower().endswith((".m3u", ".m3u8")):
+        base = os.path.dirname(os.path.abspath(source))
+        with open(source, encoding="utf-8-sig") as m3u:
+            entries = [line.strip() for line in m3u if line.strip() and not line.startswith("#")]
+        return [entry if os.path.isabs(entry) else os.path.join(base, entry) for entry in entries]
+    return [source]
+
+
+#play order for the lofi tracks: shuffle reorders whole passes, repeat wraps around (otherwise stops at the end)
+class Playlist:
+    def __init__(self, tracks, shuffle=False, repeat=True, rng=None):
+        self.tracks = list(tracks)
+        self.shuffle = shuffle
+        self.repeat = repeat
+        self.rng = rng or random.Random()
+        self.order = []
+        self.next_order = None      #order of the next shuffled pass, decided early so it can be prefetched
+        self.position = 0
+        self.restart()
+
+    def new_order(self):
+        order = list(range(len(self.tracks)))
+        if self.shuffle:
+            self.rng.shuffle(order)
+        return order
+
+    def restart(self):
+        self.order = self.next_order or self.new_order()
+        self.next_order = None
+        self.position = 0
+
+    def set_shuffle(self, shuffle):
+        current = self.order[self.position] if self.order else None
+        self.shuffle = shuffle
+        self.next_order = None
+        self.restart()
+        if current is not None:     #keep the playing track first, the rest follows the new order
+            self.order.remove(current)
+            self.order.insert(0, current)
+
+    def current(self):
+        return self.tracks[self.order[self.position]] if self.order else None
+
+    #track after the current one, without moving (used to prefetch)
+    def peek_next(self):
+        if self.position + 1 < len(self.order):
+            return self.tracks[self.order[self.position + 1]]
+        if self.repeat and self.order:
+            if self.next_order is None:
+                self.next_order = self.new_order()
+            return self.tracks[self.next_order[0]]
+        return None
+
+    def advance(self):
+        if self.position + 1 < len(self.order):
+            self.position += 1
+        elif self.repeat and self.order:
+            self.restart()
+        else:
+            return None
+        return self.current()
+
+
+#two QMediaPlayers in turn: while one plays, the other already has the next track loaded and paused, so the
+#switch at the end of a track is just play(). Each player streams its file, so memory stays flat on long mixes.
+class LofiPlayer:
+    def __init__(self, multimedia, playlist, volume=50, parent=None):
+        self.multimedia = multimedia
+        self.playlist = playlist
+        self.players = [multimedia.QMediaPlayer(parent), multimedia.QMediaPlayer(parent)]
+        self.volume = volume
+        self.active = 0
+        self.preloaded = None           #track loaded in the idle player
+        self.switch_started = None      #perf_counter() when the last track ended
+        self.last_gap_ms = None         #end of one track -> next track playing
+        self.bad_tracks = 0             #tracks skipped in a row as unplayable
+        for index, player in enumerate(self.players):
+            player.setVolume(volume)
+            player.mediaStatusChanged.connect(lambda status, index=index: self.media_status_changed(index, status))
+            player.stateChanged.connect(lambda state, index=index: self.state_changed(index, state))
+            player.error.connect(lambda error, index=index: self.media_error(index))
+
+    @property
+    def player(self):
+        return self.players[self.active]
+
+    @property
+    def idle_player(self):
+        return self.players[1 - self.active]
+
+    def set_media(self, player, track):
+        player.setMedia(self.multimedia.QMediaContent(QUrl.fromLocalFile(track)))
+
+    #loads the next track into the idle player and prerolls it (paused), so it can start without a gap
+    def prefetch(self):
+        track = self.playlist.peek_next()
+        self.preloaded = track
+        if track is None:
+            self.idle_player.setMedia(self.multimedia.QMediaContent())     #frees the idle player
+        else:
+            self.set_media(self.idle_player, track)
+            self.idle_player.pause()
+
+    def play(self):
+        self.bad_tracks = 0
+        self.playlist.restart()
+        if self.playlist.current() is None:
+            return      #no tracks found
+        self.idle_player.stop()
+        self.set_media(self.player, self.playlist.current())
+        self.player.play()
+        self.prefetch()
+
+    def pause(self):
+        self.player.pause()
+
+    def set_volume(self, volume):
+        for player in self.players:
+            player.setVolume(volume)
+
+    def resume(self):
+        self.player.play()
+
+    def restart(self):
+        self.player.setPosition(0)      #no stop()/play() teardown
+
+    def next_track(self):
+        finished = self.player
+        track = self.playlist.advance()
+        if track is None:
+            finished.stop()
+            return
+        if track == self.preloaded:
+            self.active = 1 - self.active       #next track is already loaded in the idle player
+        else:
+            self.set_media(self.idle_player, track)
+            self.active = 1 - self.active
+        if self.player.mediaStatus() == self.multimedia.QMediaPlayer.InvalidMedia:
+            finished.stop()     #failed while it was the idle player, no status change is coming
+            self.skip_bad_track()
+            return
+        self.player.play()
+        finished.stop()
+        self.prefetch()
+
+    def media_status_changed(self, index, status):
+        if index != self.active:
+            return
+        if status == self.multimedia.QMediaPlayer.EndOfMedia:
+            self.switch_started = time.perf_counter()
+            self.next_track()
+        elif status == self.multimedia.QMediaPlayer.BufferedMedia:
+            self.bad_tracks = 0
+        elif status == self.multimedia.QMediaPlayer.InvalidMedia:
+            self.skip_bad_track()
+
+    #errors that leave the status alone (e.g. a read error mid-track); once skipped, the player is no longer active
+    def media_error(self, index):
+        if index == self.active:
+            self.skip_bad_track()
+
+    #a missing, unreadable or unsupported file is skipped; the mix stops only once every track has failed in a row
+    def skip_bad_track(self):
+        print(f"lofi: skipping {self.playlist.current()}: {self.player.errorString() or 'cannot be played'}",
+              file=sys.stderr)
+        self.bad_tracks += 1
+        if self.bad_tracks >= len(self.playlist.tracks):
+            print("lofi stopped: none of the tracks can be played", file=sys.stderr)
+            for player in self.players:
+                player.stop()
+            return
+        self.next_track()
+
+    def state_changed(self, index, state):
+        if index == self.active and state == self.multimedia.QMediaPlayer.PlayingState and self.switch_started:
+            self.last_gap_ms = (time.perf_counter() - self.switch_started) * 1000
+            self.switch_started = None
+            if perf.enabled:
+                perf.record("lofi_gap_ms", self.last_gap_ms)
+
+
+ALARM_VOLUME = 0.5
+ALARM_DUCK_VOLUME = 0.3     #lofi volume is scaled by this while the alarm plays (1.0 = no ducking)
+ALARM_CACHE_FILE = "alarm.pcm"  #converted alarm PCM in DATA_DIR, reused while the WAV and device format match
+
+
+#16-bit PCM samples of a WAV file -> (array of samples, channels, sample rate)
+def decode_wav(path):
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2 or wav.getcomptype() != "NONE":
+            raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+        samples = array.array("h", wav.readframes(wav.getnframes()))
+        if sys.byteorder == "big":
+            samples.byteswap()      #WAV data is little-endian
+        return samples, wav.getnchannels(), wav.getframerate()
+
+
+#drops near-silent frames from the start, so the first frame that is played is already audible
+def trim_leading_silence(samples, channels, threshold=64):
+    for index, sample in enumerate(samples):
+        if abs(sample) > threshold:
+            return samples[index - index % channels:]
+    return samples[:0]
+
+
+#converts to the output device's channel count and rate (linear interpolation), done once before the first play
+def convert_pcm(samples, channels, rate, out_channels, out_rate):
+    frames = len(samples) // channels
+    if channels != out_channels:
+        mono = [sum(samples[i * channels:(i + 1) * channels]) // channels for i in range(frames)] \
+            if channels > 1 else samples
+        samples = array.array("h", (mono[i] for i in range(frames) for _ in range(out_channels)))
+        channels = out_channels
+    if rate == out_rate or frames < 2:
+        return samples
+    out_frames = int(frames * out_rate / rate)
+    step = rate / out_rate
+    indexes = [min(int(frame * step), frames - 2) for frame in range(out_frames)]
+    fractions = [frame * step - index for frame, index in enumerate(indexes)]
+    out = array.array("h", bytes(2 * out_frames * channels))
+    for channel in range(channels):     #one channel at a time keeps the inner loop a plain comprehension
+        source = samples[channel::channels]
+        out[channel::channels] = array.array("h", [
+            int(source[index] + (source[index + 1] - source[index]) * fraction)
+            for index, fraction in zip(indexes, fractions)
+        ])
+    return out
+
+
+#decoded, trimmed and converted alarm PCM. With a cache_path the result is stored there, keyed by the WAV's
+#path, mtime and size and the device format, so only the first launch (or a new format) pays for the resample
+def load_alarm_pcm(path, channels, rate, cache_path=None):
+    source = os.stat(path)
+    key = f"{os.path.abspath(path)}|{source.st_mtime_ns}|{source.st_size}|{channels}|{rate}\n".encode()
+    if cache_path:
+        try:
+            with open(cache_path, "rb") as cache:
+                data = cache.read()
+            if data.startswith(key):
+                return data[len(key):]
+        except OSError:
+            pass    #not cached yet
+    samples, source_channels, source_rate = decode_wav(path)
+    samples = trim_leading_silence(samples, source_channels)
+    pcm = convert_pcm(samples, source_channels, source_rate, channels, rate).tobytes()
+    if cache_path:
+        try:
+            write_atomic(cache_path, key + pcm)
+        except OSError as error:
+            print(f"alarm cache not written, cannot write {cache_path}: {error}", file=sys.stderr)
+    return pcm
+
+
+#alarm decoded + resampled to the device format once (cached across runs), kept in memory and played through an
+#already opened QAudioOutput, so the first play after a long idle does no file I/O or format conversion
+class AlarmPlayer(QObject):
+    decoded = pyqtSignal()          #emitted by the decoder thread, handled on the GUI thread
+
+    def __init__(self, multimedia, path, volume=ALARM_VOLUME, duck=None, parent=None, cache_path=None):
+        super().__init__(parent)
+        self.duck = duck                #duck(True/False) lowers/restores the lofi while the alarm plays
+        self.requested_at = None
+        self.last_latency_ms = None     #play requested -> audio output active
+        device = multimedia.QAudioDeviceInfo.defaultOutputDevice()
+        audio_format = device.preferredFormat()
+        audio_format.setCodec("audio/pcm")
+        audio_format.setSampleSize(16)
+        audio_format.setSampleType(multimedia.QAudioFormat.SignedInt)
+        audio_format.setByteOrder(multimedia.QAudioFormat.LittleEndian)
+        if not device.isFormatSupported(audio_format):
+            audio_format = device.nearestFormat(audio_format)
+        self.channels = audio_format.channelCount()
+        self.rate = audio_format.sampleRate()
+
+        self.pcm = None
+        self.ready = False      #PCM loaded and the output opened
+        self.pending = False    #play() came before the PCM was ready; plays as soon as it is
+        self.playing = False
+        self.heard = False      #output went active since the last play(), so the next idle means it finished
+        self.buffer = QBuffer(self)
+        self.output = multimedia.QAudioOutput(device, audio_format, self)
+        self.output.setBufferSize(self.rate * self.channels * 2 // 20)   #50 ms, small for low latency
+        self.output.setVolume(volume)
+        self.output.stateChanged.connect(self.state_changed)
+        self.idle_state = multimedia.QAudio.IdleState
+        self.active_state = multimedia.QAudio.ActiveState
+        self.decoded.connect(self.open_output)
+        #off the GUI thread
+        self.decoder = threading.Thread(target=self.decode, args=(path, cache_path), daemon=True)
+        self.decoder.start()
+
+    def decode(self, path, cache_path):
+        try:
+            self.pcm = load_alarm_pcm(path, self.channels, self.rate, cache_path)
+        except (OSError, EOFError, ValueError, wave.Error) as error:
+            print(f"alarm disabled, cannot decode {path}: {error}", file=sys.stderr)
+            return
+        self.decoded.emit()
+
+    #opens the device once, pulling from the PCM buffer positioned at its end (nothing to play), and keeps it
+    #open but suspended between alarms, so play() is a seek + resume instead of a device open
+    def open_output(self):
+        self.buffer.setData(QByteArray(self.pcm))
+        self.pcm = None         #the QBuffer holds the only copy
+        self.buffer.open(QIODevice.ReadOnly)
+        self.buffer.seek(self.buffer.size())
+        self.output.start(self.buffer)
+        self.output.suspend()
+        self.ready = True
+        if self.pending:
+            self.pending = False
+            self.play(self.requested_at)
+
+    #never waits on the GUI thread: before the PCM is ready the alarm is deferred until it is
+    def play(self, requested_at=None):
+        self.requested_at = requested_at or time.perf_counter()
+        if not self.ready:
+            self.pending = True
+            return
+        if self.duck and not self.playing:
+            self.duck(True)
+        self.playing = True
+        self.heard = False
+        self.buffer.seek(0)
+        self.output.resume()
+
+    def stop(self):
+        self.output.suspend()
+        if self.duck and self.playing:
+            self.duck(False)
+        self.playing = False
+
+    def state_changed(self, state):
+        if state == self.active_state and self.playing:
+            self.heard = True
+            if self.requested_at is not None:
+                self.last_latency_ms = (time.perf_counter() - self.requested_at) * 1000
+                self.requested_at = None
+                if perf.enabled:
+                    perf.record("audio_latency_ms", self.last_latency_ms)
+        elif state == self.idle_state and self.heard:     #whole alarm played
+            self.stop()
+
+
+DATA_DIR = os.path.join(os.path.expanduser("~"), ".lofi_pomodoro")   #session history and saved state
+PRESETS_FILE = "presets.json"   #named presets and per-day plans, read from DATA_DIR (see PresetConfig)
+
+
+#writes text (or bytes) by renaming a fully written temp file over it, so a crash never leaves it half written.
+#the temp name is unique per process and thread, so windows started with --new-instance can share a data folder
+def write_atomic(path, text):
+    temp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        binary = isinstance(text, bytes)
+        with open(temp_path, "wb" if binary else "w", encoding=None if binary else "utf-8") as temp:
+            temp.write(text)
+            temp.flush()
+            os.fsync(temp.fileno())
+        os.replace(temp_path, path)
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+#append-only history of finished sessions, resets and custom timer changes (history.jsonl), plus daily/weekly
+#totals kept up to date as events arrive (rollups.json), so stats never have to scan the history.
+#Events are queued to a writer thread that appends and fsyncs in batches; the GUI thread never touches disk.
+class SessionLog:
+    def __init__(self, folder, batch_size=50, flush_seconds=2.0):
+        self.enabled = True     #False once the folder cannot be created or written: totals are then kept in memory only
+        try:
+            os.makedirs(folder, exist_ok=True)
+        except OSError as error:
+            self.disable(error)
+        self.history_path = os.path.join(folder, "history.jsonl")
+        self.rollups_path = os.path.join(folder, "rollups.json")
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.lock = threading.Lock()    #guards rollups (updated by record(), saved by the writer)
+        try:
+            with open(self.rollups_path, encoding="utf-8") as rollups:
+                self.rollups = json.load(rollups)
+        except (OSError, ValueError):
+            self.rollups = {"daily": {}, "weekly": {}}
+        self.queue = queue.Queue()
+        self.writer = threading.Thread(target=self.write_loop, daemon=True)
+        if self.enabled:
+            self.writer.start()
+
+    def disable(self, error):
+        print(f"session history disabled: {error}", file=sys.stderr)
+        self.enabled = False
+
+    #called on the GUI thread: O(1) rollup update + enqueue, no I/O
+    def record(self, event, mode, seconds=0, **fields):
+        now = time.time()
+        entry = {"ts": round(now, 3), "event": event, "mode": mode, "seconds": seconds, **fields}
+        day = time.localtime(now)
+        keys = (("daily", time.strftime("%Y-%m-%d", day)), ("weekly", time.strftime("%G-W%V", day)))
+        with self.lock:
+            for period, key in keys:
+                totals = self.rollups[period].setdefault(key, {})
+                if event == "session_finished":
+                    totals[f"{mode}_sessions"] = totals.get(f"{mode}_sessions", 0) + 1
+                    totals[f"{mode}_seconds"] = totals.get(f"{mode}_seconds", 0) + seconds
+                else:
+                    totals[event] = totals.get(event, 0) + 1
+        if self.enabled:
+            self.queue.put(entry)
+
+    #totals for today and this week, straight from the rollups
+    def stats(self, now=None):
+        day = time.localtime(now)
+        with self.lock:
+            return (dict(self.rollups["daily"].get(time.strftime("%Y-%m-%d", day), {})),
+                    dict(self.rollups["weekly"].get(time.strftime("%G-W%V", day), {})))
+
+    #a batch is written when it is full, flush_seconds after its first event, or on close
+    def write_loop(self):
+        batch = []
+        deadline = None
+        closing = False
+        while not closing:
+            try:
+                entry = self.queue.get(timeout=max(0.0, deadline - time.monotonic()) if batch else None)
+                if entry is None:
+                    closing = True
+                else:
+                    if not batch:
+                        deadline = time.monotonic() + self.flush_seconds
+                    batch.append(entry)
+            except queue.Empty:
+                pass
+            if batch and (closing or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                try:
+                    self.flush(batch)
+                except OSError as error:
+                    self.disable(error)     #disk full, folder removed...: stop queuing, the writer ends here
+                    return
+                batch = []
+
+    #one write + one fsync for the whole batch, then the rollups snapshot
+    def flush(self, batch):
+        with open(self.history_path, "a", encoding="utf-8") as history:
+            history.write("".join(json.dumps(entry) + "\n" for entry in batch))
+            history.flush()
+            os.fsync(history.fileno())
+        with self.lock:
+            snapshot = json.dumps(self.rollups)
+        write_atomic(self.rollups_path, snapshot)
+
+    #flushes whatever is still queued (called when the window closes)
+    def close(self):
+        if self.writer.is_alive():
+            self.queue.put(None)
+            self.writer.join()
+
+
+SNAPSHOT_INTERVAL_MS = 10000   #while running, the saved state is re-checked at most this often
+
+
+#latest timer state in state.json, replaced atomically (temp file + rename) by a writer thread; unchanged
+#states are skipped and a backlog of changes collapses into one write of the newest state
+class StateStore:
+    def __init__(self, folder):
+        self.enabled = True     #False once the folder cannot be created or written: no crash-safe resume then
+        try:
+            os.makedirs(folder, exist_ok=True)
+        except OSError as error:
+            self.disable(error)
+        self.path = os.path.join(folder, "state.json")
+        self.last_saved = None
+        self.pending = None
+        self.closing = False
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.writer = threading.Thread(target=self.write_loop, daemon=True)
+        if self.enabled:
+            self.writer.start()
+
+    def disable(self, error):
+        print(f"state snapshots disabled: {error}", file=sys.stderr)
+        self.enabled = False
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as state:
+                return json.load(state)
+        except (OSError, ValueError):
+            return None     #first run, or an unreadable file: start fresh
+
+    #called on the GUI thread; returns True if a write was queued
+    def save(self, state):
+        if not self.enabled or state == self.last_saved:
+            return False
+        self.last_saved = state
+        with self.lock:
+            self.pending = state
+        self.wake.set()
+        return True
+
+    def write_loop(self):
+        while True:
+            self.wake.wait()
+            self.wake.clear()
+            with self.lock:
+                state, self.pending = self.pending, None
+            if state is not None:
+                try:
+                    write_atomic(self.path, json.dumps(state))
+                except OSError as error:
+                    self.disable(error)
+                    return
+            if self.closing:
+                return
+
+    def close(self):
+        if self.writer.is_alive():
+            self.closing = True
+            self.wake.set()
+            self.writer.join()
+
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    multimedia_ready = pyqtSignal()
+
+    def __init__(self, lofi_source=None, data_dir=None):
+        construction_start = time.perf_counter()
+        assets_before = assets.load_seconds
         super().__init__()
 
         # styling for buttons (set custom timer, play, pause, restart)
@@ -259,34 +1947,35 @@ class MainWindow(QMainWindow):
                 }
             """)
 
-        self.setWindowIcon(QIcon("clock_ring.png"))  #replace with file path
+        self.setWindowIcon(assets.icon("clock_ring.png"))
         self.setWindowTitle("Pomodoro")
         self.setGeometry(2473, 140, 400, 540)       #set to top right of screen with min size needed
         self.setFixedSize(400, 540)                 #locks size (cannot use expand window button)
 
         # set background image
-        og_pixmap = QPixmap("trains.jpg")   #replace with file path
-        custom_bkgrnd = QLabel(self)
-        custom_bkgrnd.setPixmap(og_pixmap)
-        custom_bkgrnd.setScaledContents(True)
-        custom_bkgrnd.setGeometry(0, 0, self.width(), self.height())  #background image fits defined Window dimensions (400 x 540)
-
-        # State: "work" or "break"
-        self.mode = "work"
-        self.work_minutes = 25
-        self.break_minutes = 5
-
-        # alarm sound for when mode switches
-        self.alarm = QSoundEffect()  # use this instead of Player so that music is not interrupted
-        self.alarm.setSource(QUrl.fromLocalFile("alarm_sound.wav")) #replace with file path
-        self.alarm.setVolume(0.5)
+        self.background = add_background(self, "trains.jpg")  #background image decoded at defined Window dimensions (400 x 540)
+
+        # timer state machine (mode, durations, countdown) lives in the headless core
+        self.core = PomodoroCore(config=load_presets(os.path.join(data_dir or DATA_DIR, PRESETS_FILE)))
+        self.core.session_finished.connect(self.session_finished)
+        self.notice = None      #open session-over popup, if any
+
+        # alarm sound and lofi player are created on first use (see load_multimedia)
+        self.alarm = None
+        self.lofi = None
+        self.lofi_source = lofi_source or default_lofi_source()     #folder, .m3u or single audio file
+        self.multimedia_ready.connect(self.prepare_alarm)
+        self.data_dir = data_dir or DATA_DIR
+        self.session_log = SessionLog(data_dir or DATA_DIR)
+        self.state_store = StateStore(data_dir or DATA_DIR)
 
         # Countdown circle
-        self.countdown = CircularCountdown(
-            self.work_minutes * 60,
-            finished_callback=self.session_finished
-
-        )
+        self.countdown = CircularCountdown(countdown_timer=self.core.countdown)
+        self.core.restore(self.state_store.load() or {})
+        self.snapshot_timer = QTimer(self)      #re-anchors the wall-clock deadline in case the system clock moved
+        self.snapshot_timer.timeout.connect(self.save_state)
+        self.core.countdown.state_changed.connect(self.core_state_changed)
+        self.save_state()
 
         # Clock
         self.clock = DigitalClock()
@@ -297,23 +1986,23 @@ class MainWindow(QMainWindow):
 
         # Left column: Start Pomodoro
         start_button = QPushButton()
-        start_button.setIcon(QIcon("play.png"))  #replace with file path
+        start_button.setIcon(assets.icon("play.png"))
         start_button.setIconSize(QSize(32, 32))
-        start_button.clicked.connect(lambda: self.countdown.start())
+        start_button.clicked.connect(self.core.start)
         left_layout = QVBoxLayout()
         left_layout.addWidget(start_button)
 
         # Middle Column: pause Pomodoro
         pause_button = QPushButton()
-        pause_button.setIcon(QIcon("pause.png"))  #replace with file path
+        pause_button.setIcon(assets.icon("pause.png"))
         pause_button.setIconSize(QSize(32, 32))
-        pause_button.clicked.connect(self.countdown.pause)
+        pause_button.clicked.connect(self.core.pause)
         middle_layout = QVBoxLayout()
         middle_layout.addWidget(pause_button)
 
         # Right Column: reset Pomodoro
         reset_button = QPushButton()
-        reset_button.setIcon(QIcon("restart.png"))  #replace with file path
+        reset_button.setIcon(assets.icon("restart.png"))
         reset_button.setIconSize(QSize(32, 32))
         reset_button.clicked.connect(self.reset_timer)
         right_layout = QVBoxLayout()
@@ -362,18 +2051,40 @@ class MainWindow(QMainWindow):
         """)
 
         #View Menu (top left)
-        view_menu = menubar.addMenu(QIcon("view_window.png"), "View")    #replace with file path
+        view_menu = menubar.addMenu(assets.icon("view_window.png"), "View")
         #Drop down control for app location
         self.always_on_top_action = QAction("Always on Top", self, checkable=True)
         self.always_on_top_action.triggered.connect(self.toggle_always_on_top)
         view_menu.addAction(self.always_on_top_action)
+        #Drop down control for smooth (animated) countdown arc
+        self.smooth_arc_action = QAction("Smooth Arc", self, checkable=True)
+        self.smooth_arc_action.triggered.connect(self.toggle_smooth_arc)
+        view_menu.addAction(self.smooth_arc_action)
+        #Drop down control for today's / this week's totals
+        self.stats_action = QAction("Stats", self)
+        self.stats_action.triggered.connect(self.show_stats)
+        view_menu.addAction(self.stats_action)
+        #Drop down control for mini mode (window hidden, remaining time in the system tray)
+        self.tray = None    #created on first use
+        self.tray_action = QAction("Mini Mode (Tray)", self)
+        self.tray_action.triggered.connect(self.enter_tray_mode)
+        self.tray_action.setEnabled(QSystemTrayIcon.isSystemTrayAvailable())   #no tray -> no way back to the window
+        view_menu.addAction(self.tray_action)
+        #Drop down controls for the opt-in instrumentation (paint, tick jitter, stalls, audio latency)
+        self.perf_overlay = None    #created on first use
+        self.perf_was_enabled = False   #recording already on (--perf) before the overlay was shown
+        self.perf_overlay_action = QAction("Performance Overlay", self, checkable=True)
+        self.perf_overlay_action.triggered.connect(self.toggle_perf_overlay)
+        view_menu.addAction(self.perf_overlay_action)
+        self.export_trace_action = QAction("Export Trace...", self)
+        self.export_trace_action.triggered.connect(self.export_trace)
+        view_menu.addAction(self.export_trace_action)
 
         #Mode Label (middle)
-        self.mode_menu = menubar.addMenu(f"   ~~~~~{self.mode}~~~~~  ")
+        self.mode_menu = menubar.addMenu(MODE_TITLES[self.core.mode])
 
         #Lofi Player (top right)
-        self.player = QMediaPlayer()
-        lofi_menu = menubar.addMenu(QIcon("music.png"), "Lofi")  #replace with file path
+        lofi_menu = menubar.addMenu(assets.icon("music.png"), "Lofi")
 
         #Drop down controls for Lofi
         self.play_lofi_btn = QAction("Play Lofi", self)
@@ -381,63 +2092,273 @@ class MainWindow(QMainWindow):
         lofi_menu.addAction(self.play_lofi_btn)
 
         self.pause_lofi_btn = QAction("Pause Lofi", self)
-        self.pause_lofi_btn.triggered.connect(self.player.pause)
+        self.pause_lofi_btn.triggered.connect(self.pause_lofi)
         lofi_menu.addAction(self.pause_lofi_btn)
 
         self.resume_lofi_btn = QAction("Resume Lofi", self)
-        self.resume_lofi_btn.triggered.connect(self.player.play)
+        self.resume_lofi_btn.triggered.connect(self.resume_lofi)
         lofi_menu.addAction(self.resume_lofi_btn)
 
         self.restart_lofi_btn = QAction("Restart Lofi", self)
-        self.restart_lofi_btn.triggered.connect(self.player.stop)
-        self.restart_lofi_btn.triggered.connect(self.player.play)  # should restart lofi from start
+        self.restart_lofi_btn.triggered.connect(self.restart_lofi)  # should restart lofi from start
         lofi_menu.addAction(self.restart_lofi_btn)
 
+        self.next_lofi_btn = QAction("Next Track", self)
+        self.next_lofi_btn.triggered.connect(self.next_lofi)
+        lofi_menu.addAction(self.next_lofi_btn)
+
+        self.shuffle_lofi_btn = QAction("Shuffle", self, checkable=True)
+        self.shuffle_lofi_btn.triggered.connect(self.shuffle_lofi)
+        lofi_menu.addAction(self.shuffle_lofi_btn)
+
+        self.repeat_lofi_btn = QAction("Repeat", self, checkable=True, checked=True)
+        self.repeat_lofi_btn.triggered.connect(self.repeat_lofi)
+        lofi_menu.addAction(self.repeat_lofi_btn)
+
+        self.countdown.installEventFilter(self)      #catches the first paint, then warms up popups and multimedia
+
+        asset_seconds = assets.load_seconds - assets_before
+        startup.add("asset loads", asset_seconds)
+        startup.add("widget construction", time.perf_counter() - construction_start - asset_seconds)
+
+    def eventFilter(self, obj, event):
+        if obj is self.countdown and event.type() == QEvent.Paint:
+            self.countdown.removeEventFilter(self)
+            QTimer.singleShot(0, startup.first_paint)     #after the frame has been painted
+            QTimer.singleShot(0, self.start_warm_up)      #queued behind it, so the import is profiled as later work
+            QTimer.singleShot(0, self.prewarm_popups)     #queued behind it, so popup decodes stay out of time to first paint
+        return super().eventFilter(obj, event)
+
+    def start_warm_up(self):
+        threading.Thread(target=self.warm_up_multimedia, daemon=True).start()
+
+    #runs off the GUI thread; the signal hands back to the GUI thread to open the alarm output
+    def warm_up_multimedia(self):
+        if load_multimedia() is not None:
+            self.multimedia_ready.emit()
+
+    # alarm sound for when mode switches; built after the first frame so start-up never touches QtMultimedia
+    def prepare_alarm(self):
+        if self.alarm is not None:
+            return
+        multimedia = load_multimedia()
+        if multimedia is None:
+            return
+        start = time.perf_counter()
+        self.alarm = AlarmPlayer(multimedia, asset_path("alarm_sound.wav"), duck=self.duck_lofi, parent=self,
+                                 cache_path=os.path.join(self.data_dir, ALARM_CACHE_FILE))
+        startup.add("multimedia init", time.perf_counter() - start)
+
+    def play_alarm(self, requested_at=None):
+        self.prepare_alarm()
+        if self.alarm is not None:
+            self.alarm.play(requested_at)   # own output instead of the lofi Player so that music is not interrupted
+
+    def duck_lofi(self, ducked):
+        if self.lofi is not None:
+            self.lofi.set_volume(int(self.lofi.volume * ALARM_DUCK_VOLUME) if ducked else self.lofi.volume)
+
+    #decodes the popup backgrounds ahead of time so the first session-over popup opens without touching disk
+    def prewarm_popups(self):
+        for popup in (CustomMessage, CustomTimer):
+            assets.background(popup.BACKGROUND, popup.FIXED_SIZE, self.devicePixelRatioF())
+
     #Called by set custom timer button on Main Central Widget -> if QSpin boxes + ok OR default button on Dialog pressed, dialog.exec_() == QDialog.Accepted is true
     def set_custom_time(self):
-        dialog = CustomTimer(self)
-        if dialog.exec_() == QDialog.Accepted:
-            self.work_minutes = dialog.get_work_value()         #functions at end of CustomTimer class
-            self.break_minutes = dialog.get_break_value()
-            # reset timer
-            self.mode = "work"
-            self.mode_menu.setTitle(f"   ~~~~~{self.mode}~~~~~  ")  # special for setting work title on menu
-            self.countdown.reset(self.work_minutes * 60)
+        dialog = CustomTimer(self, self.core.config.presets)
+        modal_start = time.perf_counter()
+        accepted = dialog.exec_() == QDialog.Accepted
+        if perf.enabled:
+            perf.record("modal_ms", (time.perf_counter() - modal_start) * 1000)
+        if accepted:
+            work_minutes = dialog.get_work_value()         #functions at end of CustomTimer class
+            break_minutes = dialog.get_break_value()
+            preset_name = dialog.get_preset_name()
+            self.session_log.record("custom_time", self.core.mode, self.core.elapsed_seconds(), preset=preset_name,
+                                    work_minutes=work_minutes, break_minutes=break_minutes)
+            if preset_name:
+                self.core.set_preset(self.core.config.presets[preset_name])    # reset timer, with long breaks
+            elif work_minutes and break_minutes:    # a blank spin box (0) leaves the timer as it is
+                self.core.set_durations(work_minutes, break_minutes)   # reset timer
 
     #Called by reset button on Main Central Widget
     def reset_timer(self):
-        if self.mode == "work":
-            self.countdown.reset(self.work_minutes * 60)   #does not start the clock
+        self.session_log.record("reset", self.core.mode, self.core.elapsed_seconds())
+        self.core.reset()
+
+    #Called by the core when remaining_seconds == 0, after it has switched mode and started the next deadline;
+    #shows a CustomMessage popup without blocking (open() instead of exec_(), so no nested event loop)
+    def session_finished(self, finished_mode, seconds):
+        self.play_alarm(time.perf_counter())    #alarm latency is measured from here
+        self.session_log.record("session_finished", finished_mode, seconds, preset=self.core.preset.name,
+                                work_minutes=self.core.work_minutes, break_minutes=self.core.break_minutes)
+        title, message, _ = SESSION_TRANSITIONS[finished_mode]
+        self.show_notice(title, message)
+
+    #one popup at a time: transitions missed while it is still open are coalesced into it (latest message wins)
+    def show_notice(self, title, message):
+        if self.notice is not None and self.notice.isVisible():
+            self.notice.set_message(title, message)
         else:
-            self.countdown.reset(self.break_minutes * 60)
-
-    #Called when remaining_seconds == 0, should call a CustomMessage Dialog popup, change mode Label, and set new total_seconds
-    def session_finished(self):
-        self.alarm.play()
-        if self.mode == "work":
-            # Switch to break
-            break_popup = CustomMessage("Session Over!", "~~take a break~~", self, "clock_ring.png")  #replace with file path
-            break_popup.exec_()
-            self.mode = "break"
-            self.countdown.start(self.break_minutes * 60)           #after work, DOES start break timer
-            self.mode_menu.setTitle(f"  ~~~~~{self.mode}~~~~~  ")   #special for setting break title on menu
+            self.notice = CustomMessage(title, message, self, "clock_ring.png")
+            self.notice.setAttribute(Qt.WA_DeleteOnClose)
+            self.notice.finished.connect(self.notice_closed)
+            self.notice.open()
 
-        else:
-            # Switch back to work
-            work_popup = CustomMessage("Break Over!", "~~back to work~~", self, "clock_ring.png")   #replace with file path
-            work_popup.exec_()
-            self.mode = "work"
-            self.countdown.reset(self.work_minutes * 60)        #after one cycle, does NOT start work timer
-            self.mode_menu.setTitle(f"   ~~~~~{self.mode}~~~~~  ")    #special for setting work title on menu
+    def notice_closed(self):
+        self.notice = None
 
     #Called by plan lofi in menubar (ensures music cannot be paused, restarted, or resumed before lofi starts)
     def play_lofi(self):
-        # add music wav file
-        url = QUrl.fromLocalFile("lofi.wav")  #replace with file path
-        content = QMediaContent(url)
-        self.player.setMedia(content)
-        self.player.setVolume(50)
-        self.player.play()
+        if self.lofi is None:
+            multimedia = load_multimedia()
+            if multimedia is None:
+                return
+            start = time.perf_counter()
+            try:
+                tracks = load_tracks(self.lofi_source)
+            except (OSError, UnicodeDecodeError) as error:     #unreadable folder or playlist: lofi stays off
+                print(f"lofi unavailable, cannot read {self.lofi_source}: {error}", file=sys.stderr)
+                notice = QMessageBox(QMessageBox.NoIcon, "Lofi", f"Cannot read {self.lofi_source}:\n{error}",
+                                     QMessageBox.Ok, self)
+                notice.setAttribute(Qt.WA_DeleteOnClose)
+                notice.open()
+                return
+            playlist = Playlist(tracks, self.shuffle_lofi_btn.isChecked(), self.repeat_lofi_btn.isChecked())
+            self.lofi = LofiPlayer(multimedia, playlist, parent=self)
+            startup.add("multimedia init", time.perf_counter() - start)
+        self.lofi.play()    #plays the playlist from the top
+
+    def pause_lofi(self):
+        if self.lofi is not None:
+            self.lofi.pause()
+
+    def resume_lofi(self):
+        if self.lofi is not None:
+            self.lofi.resume()
+
+    def restart_lofi(self):
+        if self.lofi is not None:
+            self.lofi.restart()
+
+    def next_lofi(self):
+        if self.lofi is not None:
+            self.lofi.next_track()
+
+    def shuffle_lofi(self, checked):
+        if self.lofi is not None:
+            self.lofi.playlist.set_shuffle(checked)
+            self.lofi.prefetch()
+
+    def repeat_lofi(self, checked):
+        if self.lofi is not None:
+            self.lofi.playlist.repeat = checked
+            self.lofi.prefetch()
+
+    def core_state_changed(self):
+        self.mode_menu.setTitle(MODE_TITLES[self.core.mode])
+        self.save_state()
+
+    def save_state(self):
+        self.state_store.save(self.core.snapshot())
+        if self.core.countdown.engine.running:
+            if not self.snapshot_timer.isActive():
+                self.snapshot_timer.start(SNAPSHOT_INTERVAL_MS)
+        else:
+            self.snapshot_timer.stop()
+
+    #called by View menu in menubar; reads the pre-aggregated rollups, so it is instant regardless of history size
+    def show_stats(self):
+        lines = []
+        for label, totals in zip(("Today", "This week"), self.session_log.stats()):
+            lines.append(f"{label}: {totals.get('work_sessions', 0)} pomodoros, "
+                         f"{totals.get('work_seconds', 0) // 60} min work, "
+                         f"{(totals.get('break_seconds', 0) + totals.get('long_break_seconds', 0)) // 60} min break")
+        stats = QMessageBox(QMessageBox.NoIcon, "Stats", "\n".join(lines), QMessageBox.Ok, self)
+        stats.setAttribute(Qt.WA_DeleteOnClose)
+        stats.open()
+
+    def closeEvent(self, event):
+        self.save_state()
+        self.state_store.close()
+        self.session_log.close()    #writes out anything still queued
+        super().closeEvent(event)
+
+    #hides the window and frees what only it needs: decoded background, ring layer, per-second ticks and repaints
+    def enter_tray_mode(self):
+        if self.tray is None:
+            self.tray = TrayIcon(self.core, self)
+            self.tray.setContextMenu(self.build_tray_menu())
+            self.tray.activated.connect(lambda reason: self.activate() if reason != QSystemTrayIcon.Context else None)
+        QApplication.setQuitOnLastWindowClosed(False)   #closing a session popup must not quit while hidden
+        self.hide()
+        self.background.clear()
+        assets.release_background("trains.jpg")
+        self.countdown.invalidate_static_layer()
+        self.core.countdown.set_tick_seconds(60)
+        self.tray.show()
+
+    def build_tray_menu(self):
+        menu = QMenu(self)
+        menu.addAction("Show Window", self.activate)
+        menu.addAction("Start", self.core.start)
+        menu.addAction("Pause", self.core.pause)
+        menu.addSeparator()
+        menu.addAction("Quit", self.quit_from_tray)
+        return menu
+
+    def leave_tray_mode(self):
+        if self.tray is None or not self.tray.isVisible():
+            return
+        self.tray.hide()
+        self.core.countdown.set_tick_seconds(1)
+        self.background.setPixmap(assets.background("trains.jpg", self.size(), self.devicePixelRatioF()))
+        QApplication.setQuitOnLastWindowClosed(True)
+
+    def quit_from_tray(self):
+        self.close()    #saves state and flushes history (closeEvent) even though the window is hidden
+        QApplication.quit()
+
+    #a second launch handed its arguments over to this window (or the tray icon was clicked); bring it forward
+    def activate(self):
+        self.leave_tray_mode()
+        self.showNormal()
+        self.raise_()
+        self.activateWindow()
+
+    #called by View menu in menubar; recording runs only while the overlay is shown (or with --perf)
+    def toggle_perf_overlay(self, checked):
+        if self.perf_overlay is None:
+            self.perf_overlay = PerfOverlay(self)
+        if checked:
+            self.perf_was_enabled = perf.enabled
+            perf.set_enabled(True)
+            self.perf_overlay.move(0, self.menuBar().height())
+            self.perf_overlay.show()
+        else:
+            self.perf_overlay.hide()
+            perf.set_enabled(self.perf_was_enabled)
+
+    #called by View menu in menubar
+    def export_trace(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Trace", os.path.join(self.data_dir, "pomodoro-trace.json"),
+                                              "Trace (*.json)")
+        if not path:
+            return
+        try:
+            count = perf.export_trace(path)
+        except OSError as error:    #read-only folder, full disk: report it, the app keeps running
+            message = f"Cannot write {path}:\n{error}"
+        else:
+            hint = "" if count else "\n(nothing recorded yet: show the Performance Overlay or start with --perf)"
+            message = f"{count} samples written to {path}{hint}"
+        notice = QMessageBox(QMessageBox.NoIcon, "Export Trace", message, QMessageBox.Ok, self)
+        notice.setAttribute(Qt.WA_DeleteOnClose)
+        notice.open()
+
+    #called by View menu in menubar
+    def toggle_smooth_arc(self, checked):
+        self.countdown.set_animation_fps(SMOOTH_ARC_FPS if checked else None)
 
     #called by View menu in menubar
     def toggle_always_on_top(self, checked):
@@ -448,8 +2369,88 @@ class MainWindow(QMainWindow):
         self.show()
 
 
+#single-instance mode: if a window already serves this socket, forward our arguments to it and let it raise itself.
+#runs before QApplication exists, so a second launch never loads fonts, images or audio. True if handed off.
+def hand_off(name, args, timeout_ms=200):
+    socket = QLocalSocket()
+    socket.connectToServer(name)
+    if not socket.waitForConnected(timeout_ms):
+        return False
+    requests = launch_requests(args) + [{"cmd": "activate"}]
+    socket.write(b"".join(json.dumps(request).encode() + b"\n" for request in requests))
+    socket.waitForBytesWritten(timeout_ms)
+    replies = 0
+    while replies < len(requests) and (socket.canReadLine() or socket.waitForReadyRead(1000)):
+        while socket.canReadLine():
+            reply = json.loads(bytes(socket.readLine()))
+            if not reply["ok"]:
+                print(f"running instance refused the request: {reply['error']}", file=sys.stderr)
+            replies += 1
+    socket.disconnectFromServer()
+    return replies == len(requests)
+
+
+#--perf / --perf-trace: instrumentation on from the start, trace written when the event loop exits
+def start_perf(app, args):
+    if args.perf or args.perf_trace:
+        perf.set_enabled(True)
+    if args.perf_trace:
+        app.aboutToQuit.connect(lambda: export_trace_on_quit(args.perf_trace))
+
+
+#an exception escaping the aboutToQuit slot would abort the process instead of letting it exit cleanly
+def export_trace_on_quit(path):
+    try:
+        perf.export_trace(path)
+    except OSError as error:
+        print(f"perf trace not written, cannot write {path}: {error}", file=sys.stderr)
+
+
+#the first instance applies its own flags; a bad one (e.g. an unknown --preset) is reported like a refused
+#hand-off and the rest still apply
+def apply_launch_requests(server, args):
+    for request in launch_requests(args):
+        try:
+            server.handle(request, None)
+        except (ValueError, TypeError, KeyError) as error:
+            print(f"launch option ignored: {error}", file=sys.stderr)
+
+
+#timer core + control API only, no window, fonts, images or audio (for scripting many instances per host)
+def run_headless(args):
+    app = QCoreApplication(sys.argv)
+    start_perf(app, args)
+    config = load_presets(os.path.join(args.data_dir or DATA_DIR, PRESETS_FILE))
+    server = ControlServer(PomodoroCore(config=config), args.socket, new_core=lambda: PomodoroCore(config=config))
+    for timer_id in range(1, args.timers):
+        server.add_core(str(timer_id), PomodoroCore(config=config))
+    apply_launch_requests(server, args)
+    print(f"headless pomodoro listening on {server.server.fullServerName()}", flush=True)
+    return app.exec_()
+
+
 if __name__ == "__main__":
+    args = parse_args(sys.argv)
+    if args.headless:
+        args.socket = args.socket or "lofi-pomodoro"
+        sys.exit(run_headless(args))
+    instance_name = args.socket or INSTANCE_SOCKET
+    if not args.new_instance and hand_off(instance_name, args):
+        sys.exit(0)
     app = QApplication(sys.argv)
-    window = MainWindow()
+    start_perf(app, args)
+    window = MainWindow(lofi_source=args.lofi, data_dir=args.data_dir)
+    try:
+        window.control = ControlServer(window.core, instance_name, window, activate=window.activate)
+    except OSError:
+        if not args.new_instance and hand_off(instance_name, args):    #lost a race with a simultaneous launch
+            sys.exit(0)
+        if not args.new_instance:
+            raise
+        #the first window keeps the name, this one is still scriptable on its own
+        window.control = ControlServer(window.core, f"{instance_name}-{os.getpid()}", window, activate=window.activate)
+    apply_launch_requests(window.control, args)
     window.show()
+    if args.profile_startup:
+        QTimer.singleShot(1000, lambda: print(startup.report(), file=sys.stderr))  #after first paint and warm-up
     sys.exit(app.exec_())